@@ -1,25 +1,116 @@
 from fastapi import FastAPI, HTTPException, Depends, status, UploadFile, File, Form, Request, Body
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse, FileResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import RedirectResponse, Response, StreamingResponse, JSONResponse, PlainTextResponse
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel, EmailStr, ValidationError
-from typing import Optional, List, Literal
-from datetime import datetime, timedelta
-from sqlalchemy import create_engine, Column, Integer, String, Text, LargeBinary, ForeignKey, Enum
-from sqlalchemy.orm import sessionmaker, declarative_base, relationship, Session
+from typing import Optional, List, Literal, Union
+from fastapi import Query
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine, Column, Integer, String, Text, LargeBinary, ForeignKey, Enum, DateTime, Boolean, Index, inspect, text, func, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import sessionmaker, declarative_base, relationship, Session, defer, load_only
+from sqlalchemy.schema import CreateIndex
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager, contextmanager
 import base64
+import bisect
+import contextvars
+import csv
+import gzip
+import hashlib
+import io
+import json
+import logging
 import os
+import random
+import sys
+import threading
+import time
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow 미설치 시 썸네일 대신 원본 제공
+    Image = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack 미설치 시 항상 JSON 응답
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # brotli 미설치 시 gzip만 사용
+    brotli = None
 
 # --- 환경설정 ---
 SECRET_KEY = "your-secret-key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+THUMBNAIL_SIZE = 96
+# 업로드 이미지의 최대 가로/세로 픽셀 (작은 파일로 거대한 이미지를 디코딩시키는 것 방지)
+IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", "4096"))
+IMAGE_CACHE_SECONDS = 300
+MENTOR_PAGE_SIZE_MAX = 100
+MENTOR_COUNTER_REPAIR_INTERVAL_SECONDS = int(os.getenv("MENTOR_COUNTER_REPAIR_INTERVAL_SECONDS", "3600"))
+CHANGES_PAGE_SIZE_MAX = 500
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+REFRESH_TOKEN_PRUNE_INTERVAL_SECONDS = int(os.getenv("REFRESH_TOKEN_PRUNE_INTERVAL_SECONDS", "3600"))
+REFRESH_TOKEN_PRUNE_BATCH_SIZE = int(os.getenv("REFRESH_TOKEN_PRUNE_BATCH_SIZE", "500"))
+IMAGE_HASH_BACKFILL_BATCH_SIZE = int(os.getenv("IMAGE_HASH_BACKFILL_BATCH_SIZE", "100"))
+# 관리자 이메일 목록 (쉼표 구분) - export 등 관리자 전용 API 접근 허용
+ADMIN_EMAILS = {e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()}
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+# 요청 프로파일링: 관리자 토큰(또는 PROFILE_KEY)과 함께 X-Profile: 1 헤더를 보내거나 샘플링 비율로 활성화
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_KEY = os.getenv("PROFILE_KEY") or None
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_SECONDS", "0.001"))
+PROFILE_STORE_SIZE = int(os.getenv("PROFILE_STORE_SIZE", "50"))
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./mentor_mentee.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+# 거절/취소된 요청 아카이빙 (보존 기간이 지난 요청을 소량씩 archive 테이블로 이동)
+ARCHIVER_ENABLED = os.getenv("ARCHIVER_ENABLED", "1") not in ("0", "false", "False")
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", "30"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "200"))
+ARCHIVE_BATCH_PAUSE_SECONDS = float(os.getenv("ARCHIVE_BATCH_PAUSE_SECONDS", "0.5"))
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", "600"))
+TERMINAL_STATUSES = ("rejected", "cancelled", "expired")
+
+# 오래된 pending 요청 만료 (TTL이 지난 요청을 소량씩 expired 상태로 변경)
+EXPIRY_ENABLED = os.getenv("EXPIRY_ENABLED", "1") not in ("0", "false", "False")
+PENDING_REQUEST_TTL_DAYS = int(os.getenv("PENDING_REQUEST_TTL_DAYS", "14"))
+EXPIRY_BATCH_SIZE = int(os.getenv("EXPIRY_BATCH_SIZE", "200"))
+EXPIRY_BATCH_PAUSE_SECONDS = float(os.getenv("EXPIRY_BATCH_PAUSE_SECONDS", "0.5"))
+EXPIRY_INTERVAL_SECONDS = int(os.getenv("EXPIRY_INTERVAL_SECONDS", "300"))
+
+# DATABASE_URL: 어떤 SQLAlchemy URL이든 허용 (운영은 PostgreSQL, 개발은 SQLite)
+# DATABASE_REPLICA_URL: 지정하면 읽기 전용 핸들러는 replica 엔진으로 라우팅
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./mentor_mentee.db")
+SQLALCHEMY_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL") or None
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") not in ("0", "false", "False")
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+def make_engine(url: str):
+    # SQLite는 스레드 체크만 끄고 기본 풀을 사용, 그 외 DB는 풀 설정 적용
+    if url.startswith("sqlite"):
+        return create_engine(url, connect_args={"check_same_thread": False})
+    return create_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+
+engine = make_engine(SQLALCHEMY_DATABASE_URL)
+read_engine = make_engine(SQLALCHEMY_REPLICA_URL) if SQLALCHEMY_REPLICA_URL else engine
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
 # --- 모델 정의 ---
@@ -33,7 +124,15 @@ class User(Base):
     bio = Column(Text, default="")
     image = Column(LargeBinary, nullable=True)
     image_type = Column(String, nullable=True)  # 'jpg' or 'png'
+    image_hash = Column(String, nullable=True)  # sha256(image), 같은 이미지 재업로드 감지용
+    thumbnail = Column(LargeBinary, nullable=True)  # 업로드 시 한 번 만든 THUMBNAIL_SIZE 썸네일
     skills = Column(Text, default="")  # comma-separated for mentor
+    # 멘토 부하 카운터 (매칭 요청 핸들러가 같은 트랜잭션에서 갱신, repair_mentor_counters로 재계산)
+    pending_count = Column(Integer, default=0, nullable=False)
+    is_matched = Column(Boolean, default=False, nullable=False)
+    __table_args__ = (
+        Index("ix_users_availability", "role", "is_matched", "pending_count", "id"),
+    )
 
 class MatchRequest(Base):
     __tablename__ = "match_requests"
@@ -41,17 +140,160 @@ class MatchRequest(Base):
     mentor_id = Column(Integer, ForeignKey("users.id"))
     mentee_id = Column(Integer, ForeignKey("users.id"))
     message = Column(Text)
-    status = Column(String, default="pending")  # pending, accepted, rejected, cancelled
+    status = Column(String, default="pending")  # pending, accepted, rejected, cancelled, expired
+    closed_at = Column(DateTime, nullable=True, index=True)  # rejected/cancelled/expired 된 시각 (아카이빙 기준)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True)
     mentor = relationship("User", foreign_keys=[mentor_id])
     mentee = relationship("User", foreign_keys=[mentee_id])
+    __table_args__ = (
+        Index("ix_match_requests_mentor_created", "mentor_id", "created_at"),
+        Index("ix_match_requests_mentee_created", "mentee_id", "created_at"),
+        Index("ix_match_requests_status_created", "status", "created_at"),
+        Index("ix_match_requests_updated_at", "updated_at"),
+    )
+
+class MatchRequestArchive(Base):
+    # 보존 기간이 지난 거절/취소 요청 (cold 테이블, include=archived 일 때만 조회)
+    __tablename__ = "match_requests_archive"
+    id = Column(Integer, primary_key=True)
+    mentor_id = Column(Integer, index=True)
+    mentee_id = Column(Integer, index=True)
+    message = Column(Text)
+    status = Column(String)
+    closed_at = Column(DateTime)
+    created_at = Column(DateTime, index=True)
+    updated_at = Column(DateTime)
+    archived_at = Column(DateTime, nullable=False)
+
+class MatchRequestChange(Base):
+    # 매칭 요청 변경 로그 (append-only, id가 delta-sync 커서)
+    __tablename__ = "match_request_changes"
+    id = Column(Integer, primary_key=True)
+    request_id = Column(Integer, nullable=False)
+    mentor_id = Column(Integer, nullable=False)
+    mentee_id = Column(Integer, nullable=False)
+    message = Column(Text)
+    status = Column(String, nullable=False)
+    __table_args__ = (
+        Index("ix_match_request_changes_mentor_cursor", "mentor_id", "id"),
+        Index("ix_match_request_changes_mentee_cursor", "mentee_id", "id"),
+    )
+
+class RefreshToken(Base):
+    # 발급된 refresh token의 jti 저장소 (회전/폐기 확인용)
+    __tablename__ = "refresh_tokens"
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String, unique=True, index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    revoked = Column(Boolean, default=False, nullable=False)
 
 Base.metadata.create_all(bind=engine)
 
+def ensure_columns(model, columns: dict):
+    # create_all은 기존 테이블에 컬럼을 추가하지 않으므로 누락된 컬럼만 ALTER TABLE로 추가
+    # 여러 워커가 동시에 기동해도 실패하지 않도록 IF NOT EXISTS 사용 (미지원 DB는 오류 후 다시 확인)
+    table = model.__table__
+    existing = {c["name"] for c in inspect(engine).get_columns(table.name)}
+    missing = [name for name in columns if name not in existing]
+    if not missing:
+        return missing
+    if_not_exists = "IF NOT EXISTS " if engine.dialect.name == "postgresql" else ""
+    for name in missing:
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {if_not_exists}{name} {columns[name]}"))
+        except DBAPIError:
+            if name not in {c["name"] for c in inspect(engine).get_columns(table.name)}:
+                raise
+    with engine.begin() as conn:
+        for index in table.indexes:
+            if any(c.name in missing for c in index.columns):
+                conn.execute(CreateIndex(index, if_not_exists=True))
+    return missing
+
+ensure_columns(MatchRequest, {"closed_at": "TIMESTAMP", "created_at": "TIMESTAMP", "updated_at": "TIMESTAMP"})
+ensure_columns(MatchRequestArchive, {"created_at": "TIMESTAMP", "updated_at": "TIMESTAMP"})
+with engine.begin() as conn:
+    # 컬럼 추가 이전의 요청은 지금부터 보존 기간/TTL을 계산
+    _now = datetime.utcnow()
+    conn.execute(
+        MatchRequest.__table__.update()
+        .where(MatchRequest.status.in_(TERMINAL_STATUSES), MatchRequest.closed_at.is_(None))
+        .values(closed_at=_now)
+    )
+    conn.execute(
+        MatchRequest.__table__.update()
+        .where(MatchRequest.created_at.is_(None))
+        .values(created_at=_now, updated_at=_now)
+    )
+
+def repair_mentor_counters(db: Session) -> int:
+    # match_requests 기준으로 멘토 카운터를 다시 계산하고 수정된 멘토 수를 반환
+    pending = dict(
+        db.query(MatchRequest.mentor_id, func.count(MatchRequest.id))
+        .filter(MatchRequest.status == "pending")
+        .group_by(MatchRequest.mentor_id)
+        .all()
+    )
+    matched = {
+        mentor_id for (mentor_id,) in
+        db.query(MatchRequest.mentor_id).filter(MatchRequest.status == "accepted").distinct()
+    }
+    fixed = 0
+    mentors = db.query(User).options(load_only(User.id, User.pending_count, User.is_matched)).filter(User.role == "mentor").populate_existing()
+    for u in mentors:
+        expected = (pending.get(u.id, 0), u.id in matched)
+        if (u.pending_count, u.is_matched) != expected:
+            u.pending_count, u.is_matched = expected
+            fixed += 1
+    db.commit()
+    return fixed
+
+if ensure_columns(User, {
+    "pending_count": "INTEGER NOT NULL DEFAULT 0",
+    "is_matched": "BOOLEAN NOT NULL DEFAULT FALSE",
+}):
+    _db = SessionLocal()
+    try:
+        repair_mentor_counters(_db)
+    finally:
+        _db.close()
+
+ensure_columns(User, {"thumbnail": LargeBinary().compile(dialect=engine.dialect)})
+
+# 기존 이미지의 해시는 기동 후 백그라운드 작업(image-hash-backfill)이 채움
+ensure_columns(User, {"image_hash": "VARCHAR"})
+
 # --- 보안/유틸 ---
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/login")
 
-app = FastAPI(title="Mentor-Mentee API", docs_url="/swagger-ui", openapi_url="/openapi.json")
+logger = logging.getLogger("mentor_mentee")
+
+# 앱 기동 시 한 번 실행할 초기화 함수 목록
+startup_tasks = []
+# 앱 기동 시 데몬 스레드로 실행할 백그라운드 작업: (이름, 함수(stop_event))
+background_jobs = []
+
+@asynccontextmanager
+async def lifespan(app):
+    for task in startup_tasks:
+        task()
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=job, args=(stop,), name=name, daemon=True)
+        for name, job in background_jobs
+    ]
+    for t in threads:
+        t.start()
+    yield
+    stop.set()
+    for t in threads:
+        t.join(timeout=5)
+
+app = FastAPI(title="Mentor-Mentee API", docs_url="/swagger-ui", openapi_url="/openapi.json", lifespan=lifespan)
 
 @app.get("/openapi.json", include_in_schema=False)
 def custom_openapi():
@@ -69,6 +311,157 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- 요청 프로파일링 (관리자 opt-in) ---
+class RequestProfile:
+    """한 요청의 구간별 소요 시간과 샘플링된 스택 (collapsed-stack 형식으로 출력 가능)"""
+
+    def __init__(self, method: str, path: str):
+        self.id = os.urandom(6).hex()
+        self.method = method
+        self.path = path
+        self.started_at = datetime.utcnow()
+        self.duration = 0.0
+        self.sections = {}
+        self.stacks = Counter()
+        self.threads = Counter()  # 지금 이 요청의 코드를 실행 중인 스레드 id → 진입 횟수
+        self._lock = threading.Lock()
+
+    def add_section(self, name: str, seconds: float):
+        with self._lock:
+            self.sections[name] = self.sections.get(name, 0.0) + seconds
+
+    @contextmanager
+    def running(self):
+        # 스레드풀 스레드는 다른 요청에도 재사용되므로 이 요청의 코드를 실행하는 동안만 샘플링 대상으로 등록
+        ident = threading.get_ident()
+        with self._lock:
+            self.threads[ident] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.threads[ident] -= 1
+                if not self.threads[ident]:
+                    del self.threads[ident]
+
+    def active_threads(self) -> set:
+        with self._lock:
+            return set(self.threads)
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "startedAt": self.started_at.isoformat(),
+            "durationMs": round(self.duration * 1000, 3),
+            "sectionsMs": {k: round(v * 1000, 3) for k, v in self.sections.items()},
+            "samples": sum(self.stacks.values()),
+        }
+
+_current_profile = contextvars.ContextVar("current_profile", default=None)
+recent_profiles = OrderedDict()
+_recent_profiles_lock = threading.Lock()
+
+@contextmanager
+def profile_section(name: str):
+    # 프로파일링 중인 요청에서만 시간 측정 (평소에는 ContextVar 조회 한 번)
+    prof = _current_profile.get()
+    if prof is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        with prof.running():
+            yield
+    finally:
+        prof.add_section(name, time.perf_counter() - start)
+
+@contextmanager
+def profiled_thread():
+    # 구간 측정 없이 현재 스레드만 프로파일링 중인 요청의 샘플링 대상으로 등록
+    prof = _current_profile.get()
+    if prof is None:
+        yield
+        return
+    with prof.running():
+        yield
+
+def _sample_stacks(prof: RequestProfile, stop: threading.Event):
+    # 이 요청의 코드를 실행 중인 스레드만 샘플링 (같은 endpoint를 호출한 다른 요청은 제외)
+    while not stop.wait(PROFILE_INTERVAL_SECONDS):
+        active = prof.active_threads()
+        if not active:
+            continue
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id not in active:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                frame = frame.f_back
+            prof.stacks[";".join(reversed(stack))] += 1
+
+def _profile_authorized(headers: dict) -> bool:
+    if PROFILE_KEY and headers.get(b"x-profile-key", b"").decode() == PROFILE_KEY:
+        return True
+    auth = headers.get(b"authorization", b"").decode()
+    if not auth.lower().startswith("bearer "):
+        return False
+    try:
+        payload = jwt.decode(auth[7:], SECRET_KEY, algorithms=[ALGORITHM], audience="mentor-mentee-client")
+    except JWTError:
+        return False
+    return payload.get("typ") != "refresh" and (payload.get("email") or "").lower() in ADMIN_EMAILS
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        requested = headers.get(b"x-profile") == b"1" and _profile_authorized(headers)
+        if not requested and not (PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE):
+            return await self.app(scope, receive, send)
+
+        prof = RequestProfile(scope["method"], scope["path"])
+        token = _current_profile.set(prof)
+        stop = threading.Event()
+        sampler = threading.Thread(target=_sample_stacks, args=(prof, stop), daemon=True)
+        start = time.perf_counter()
+        sampler.start()
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                timing = ", ".join(f"{k};dur={v * 1000:.3f}" for k, v in prof.sections.items())
+                extra = [(b"x-profile-id", prof.id.encode())]
+                if timing:
+                    extra.append((b"server-timing", timing.encode()))
+                message = {**message, "headers": list(message.get("headers", [])) + extra}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            prof.duration = time.perf_counter() - start
+            stop.set()
+            sampler.join()
+            _current_profile.reset(token)
+            with _recent_profiles_lock:
+                recent_profiles[prof.id] = prof
+                while len(recent_profiles) > PROFILE_STORE_SIZE:
+                    recent_profiles.popitem(last=False)
+
+app.add_middleware(ProfilingMiddleware)
+# 목록 API 외의 응답도 크기가 크면 gzip
+# negotiated_response가 이미 압축한 응답(Content-Encoding 있음)은 그대로 통과 (starlette>=0.22)
+app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
 @app.get("/", include_in_schema=False)
 def root():
     return RedirectResponse(url="/swagger-ui")
@@ -86,13 +479,19 @@ class LoginRequest(BaseModel):
 
 class TokenResponse(BaseModel):
     token: str
+    refreshToken: Optional[str] = None
+
+class TokenRefreshRequest(BaseModel):
+    refreshToken: str
 
 # --- 유틸 함수 ---
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    with profile_section("hash"):
+        return pwd_context.hash(password)
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    with profile_section("hash"):
+        return pwd_context.verify(plain, hashed)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -108,6 +507,137 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     })
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def create_refresh_token(user_id: int, db: Session) -> str:
+    now = datetime.utcnow()
+    expire = now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    jti = os.urandom(16).hex()
+    db.add(RefreshToken(jti=jti, user_id=user_id, expires_at=expire))
+    return jwt.encode({
+        "sub": str(user_id),
+        "typ": "refresh",
+        "exp": expire,
+        "iat": now,
+        "iss": "mentor-mentee-app",
+        "aud": "mentor-mentee-client",
+        "jti": jti,
+    }, SECRET_KEY, algorithm=ALGORITHM)
+
+def issue_tokens(user: "User", db: Session) -> dict:
+    # access token + 새 refresh token 발급 (refresh 행은 호출자 트랜잭션에서 커밋)
+    token = create_access_token({
+        "sub": str(user.id),
+        "email": user.email,
+        "role": user.role,
+        "name": user.name,
+    })
+    refresh_token = create_refresh_token(user.id, db)
+    db.commit()
+    return {"token": token, "refreshToken": refresh_token}
+
+def record_change(db: Session, match: "MatchRequest"):
+    # 요청 상태 스냅샷을 변경 로그에 추가 (호출자 트랜잭션에서 함께 커밋)
+    db.add(MatchRequestChange(
+        request_id=match.id,
+        mentor_id=match.mentor_id,
+        mentee_id=match.mentee_id,
+        message=match.message,
+        status=match.status,
+    ))
+
+def backfill_match_request_changes():
+    # 변경 로그 도입 이전의 요청들은 현재 상태를 한 번 기록해 둠
+    db = SessionLocal()
+    try:
+        if db.query(MatchRequestChange.id).first() is None:
+            for m in db.query(MatchRequest).order_by(MatchRequest.id):
+                record_change(db, m)
+            db.commit()
+    finally:
+        db.close()
+
+backfill_match_request_changes()
+
+def adjust_mentor_load(db: Session, mentor_id: int, pending_delta: int = 0, matched: Optional[bool] = None):
+    # 동시 요청에도 값이 유실되지 않도록 UPDATE ... SET pending_count = pending_count + n 으로 반영
+    values = {}
+    if pending_delta:
+        values[User.pending_count] = User.pending_count + pending_delta
+    if matched is not None:
+        values[User.is_matched] = matched
+    if values:
+        db.query(User).filter(User.id == mentor_id).update(values, synchronize_session=False)
+
+def release_mentor_load(db: Session, req: "MatchRequest"):
+    # pending/accepted 요청이 거절·취소될 때 (상태 변경 전에 호출)
+    if req.status == "pending":
+        adjust_mentor_load(db, req.mentor_id, pending_delta=-1)
+    elif req.status == "accepted":
+        still_matched = db.query(MatchRequest.id).filter(
+            MatchRequest.mentor_id == req.mentor_id,
+            MatchRequest.status == "accepted",
+            MatchRequest.id != req.id,
+        ).first() is not None
+        adjust_mentor_load(db, req.mentor_id, matched=still_matched)
+
+class SkillIndex:
+    """정규화된 스킬 → 사용 횟수, 정렬된 키 배열에서 bisect로 prefix 검색"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._keys = []
+
+    @staticmethod
+    def normalize(skill: str) -> str:
+        return skill.strip().lower()
+
+    def rebuild(self, skill_lists):
+        counts = {}
+        for skills in skill_lists:
+            for key in {self.normalize(x) for x in skills if x.strip()}:
+                counts[key] = counts.get(key, 0) + 1
+        with self._lock:
+            self._counts = counts
+            self._keys = sorted(counts)
+
+    def update(self, old_skills, new_skills):
+        old = {self.normalize(x) for x in old_skills if x.strip()}
+        new = {self.normalize(x) for x in new_skills if x.strip()}
+        with self._lock:
+            for key in old - new:
+                # 다른 워커/스크립트/DB 직접 수정으로 추가된 스킬은 이 인덱스에 없을 수 있음
+                if key not in self._counts:
+                    continue
+                self._counts[key] -= 1
+                if self._counts[key] <= 0:
+                    del self._counts[key]
+                    self._keys.pop(bisect.bisect_left(self._keys, key))
+            for key in new - old:
+                if key not in self._counts:
+                    bisect.insort(self._keys, key)
+                self._counts[key] = self._counts.get(key, 0) + 1
+
+    def suggest(self, prefix: str, limit: int = 10):
+        prefix = self.normalize(prefix)
+        with self._lock:
+            start = bisect.bisect_left(self._keys, prefix)
+            end = bisect.bisect_left(self._keys, prefix + "\uffff")
+            matches = [(key, self._counts[key]) for key in self._keys[start:end]]
+        matches.sort(key=lambda x: (-x[1], x[0]))
+        return matches[:limit]
+
+skill_index = SkillIndex()
+
+def rebuild_skill_index():
+    db = SessionLocal()
+    try:
+        rows = db.query(User.skills).filter(User.role == "mentor", User.skills != "").all()
+        skill_index.rebuild(skills.split(",") for (skills,) in rows if skills)
+    finally:
+        db.close()
+
+startup_tasks.append(rebuild_skill_index)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -115,6 +645,64 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    # 읽기 전용 핸들러용 세션 (replica 미설정 시 primary와 동일)
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def parse_accept(header: str) -> dict:
+    # "br;q=0, gzip" → {"br": 0.0, "gzip": 1.0} (q 생략 시 1, 잘못된 q는 0)
+    prefs = {}
+    for part in header.split(","):
+        token, _, params = part.partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        prefs[token] = q
+    return prefs
+
+def negotiated_response(request: Request, rows, to_dict, headers: Optional[dict] = None) -> Response:
+    # rows를 to_dict로 변환한 목록을 Accept에 따라 msgpack/compact JSON으로 인코딩하고,
+    # 크면 Accept-Encoding에 따라 br/gzip 압축 (응답 dict 생성도 serialize 구간에 포함)
+    headers = {**(headers or {}), "Vary": "Accept, Accept-Encoding"}
+    with profile_section("serialize"):
+        content = [to_dict(r) for r in rows]
+        accept = parse_accept(request.headers.get("accept", ""))
+        msgpack_q = accept.get("application/msgpack", 0.0)
+        json_q = accept.get("application/json", accept.get("application/*", accept.get("*/*", 0.0)))
+        if msgpack is not None and msgpack_q > 0 and msgpack_q >= json_q:
+            media_type = "application/msgpack"
+            body = msgpack.packb(content)
+        else:
+            media_type = "application/json"
+            body = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if len(body) >= COMPRESSION_MIN_SIZE:
+            # q가 가장 높은 인코딩 선택 (동률이면 br 우선, q=0은 사용 안 함)
+            accept_encoding = parse_accept(request.headers.get("accept-encoding", ""))
+            encoding, best_q = None, 0.0
+            for candidate in (["br", "gzip"] if brotli is not None else ["gzip"]):
+                q = accept_encoding.get(candidate, accept_encoding.get("*", 0.0))
+                if q > best_q:
+                    encoding, best_q = candidate, q
+            if encoding == "br":
+                body = brotli.compress(body, quality=5)
+                headers["Content-Encoding"] = "br"
+            elif encoding == "gzip":
+                body = gzip.compress(body, compresslevel=6)
+                headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type=media_type, headers=headers)
+
 # --- 회원가입 ---
 @app.post("/api/signup", status_code=201)
 def signup(req: SignupRequest, db: Session = Depends(get_db)):
@@ -144,16 +732,11 @@ async def login(
 ):
     # 1. Form 방식 우선 처리
     if username and password:
-        user = db.query(User).filter(User.email == username).first()
+        with profile_section("orm"):
+            user = db.query(User).filter(User.email == username).first()
         if not user or not verify_password(password, user.hashed_password):
             raise HTTPException(status_code=401, detail="이메일 또는 비밀번호가 올바르지 않습니다.")
-        token = create_access_token({
-            "sub": str(user.id),
-            "email": user.email,
-            "role": user.role,
-            "name": user.name,
-        })
-        return {"token": token}
+        return issue_tokens(user, db)
     # 2. JSON 방식도 허용
     try:
         data = await request.json()
@@ -164,53 +747,138 @@ async def login(
         password = None
     if not username or not password:
         raise HTTPException(status_code=401, detail="username, password 필수")
-    user = db.query(User).filter(User.email == username).first()
+    with profile_section("orm"):
+        user = db.query(User).filter(User.email == username).first()
     if not user or not verify_password(password, user.hashed_password):
         raise HTTPException(status_code=401, detail="이메일 또는 비밀번호가 올바르지 않습니다.")
-    token = create_access_token({
-        "sub": str(user.id),
-        "email": user.email,
-        "role": user.role,
-        "name": user.name,
-    })
-    return {"token": token}
+    return issue_tokens(user, db)
+
+def revoke_user_refresh_tokens(db: Session, user_id: int):
+    # 이미 회전된 토큰 재사용 → 탈취 가능성, 해당 사용자의 refresh token 전부 폐기
+    db.query(RefreshToken).filter(
+        RefreshToken.user_id == user_id,
+        RefreshToken.revoked == False,
+    ).update({RefreshToken.revoked: True}, synchronize_session=False)
+    db.commit()
+
+# --- 토큰 갱신 (refresh token 회전) ---
+@app.post("/api/token/refresh", response_model=TokenResponse)
+def refresh_token(req: TokenRefreshRequest, db: Session = Depends(get_db)):
+    # 서명 검증 1회 + jti 인덱스 조회만 수행 (비밀번호 해싱 없음)
+    invalid = HTTPException(status_code=401, detail="유효하지 않은 refresh token입니다.")
+    try:
+        payload = jwt.decode(req.refreshToken, SECRET_KEY, algorithms=[ALGORITHM], audience="mentor-mentee-client")
+    except JWTError:
+        raise invalid
+    if payload.get("typ") != "refresh" or not payload.get("jti") or not payload.get("sub"):
+        raise invalid
+    stored = db.query(RefreshToken).filter(RefreshToken.jti == payload["jti"]).first()
+    if not stored or stored.user_id != int(payload["sub"]):
+        raise invalid
+    if stored.revoked:
+        revoke_user_refresh_tokens(db, stored.user_id)
+        raise invalid
+    user = db.query(User).filter(User.id == stored.user_id).first()
+    if not user:
+        raise invalid
+    # 조건부 UPDATE로 폐기: 같은 토큰으로 동시에 갱신하면 한 요청만 1행을 바꾸고 나머지는 재사용으로 처리
+    rotated = db.query(RefreshToken).filter(
+        RefreshToken.jti == stored.jti,
+        RefreshToken.revoked == False,
+    ).update({RefreshToken.revoked: True}, synchronize_session=False)
+    if rotated == 0:
+        revoke_user_refresh_tokens(db, stored.user_id)
+        raise invalid
+    return issue_tokens(user, db)
+
+# --- 로그아웃 (refresh token 폐기) ---
+@app.post("/api/token/revoke", status_code=204)
+def revoke_token(req: TokenRefreshRequest, db: Session = Depends(get_db)):
+    # 제시된 refresh token의 jti만 폐기 (이미 폐기/회전된 토큰이면 아무것도 하지 않음)
+    try:
+        payload = jwt.decode(req.refreshToken, SECRET_KEY, algorithms=[ALGORITHM], audience="mentor-mentee-client")
+    except JWTError:
+        raise HTTPException(status_code=401, detail="유효하지 않은 refresh token입니다.")
+    if payload.get("typ") != "refresh" or not payload.get("jti") or not payload.get("sub"):
+        raise HTTPException(status_code=401, detail="유효하지 않은 refresh token입니다.")
+    db.query(RefreshToken).filter(
+        RefreshToken.jti == payload["jti"],
+        RefreshToken.user_id == int(payload["sub"]),
+    ).update({RefreshToken.revoked: True}, synchronize_session=False)
+    db.commit()
+    return Response(status_code=204)
 
 # --- 인증 유틸리티 ---
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def _user_from_token(token: str, db: Session):
     credentials_exception = HTTPException(
         status_code=401,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], audience="mentor-mentee-client")
-        user_id: str = payload.get("sub")
-        if user_id is None:
+    with profiled_thread():
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], audience="mentor-mentee-client")
+            user_id: str = payload.get("sub")
+            if user_id is None or payload.get("typ") == "refresh":
+                raise credentials_exception
+        except JWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    user = db.query(User).filter(User.id == int(user_id)).first()
+        # 프로필 이미지(최대 1MB)는 인증마다 읽지 않도록 지연 로드
+        with profile_section("orm"):
+            user = db.query(User).options(defer(User.image), defer(User.thumbnail)).filter(User.id == int(user_id)).first()
     if user is None:
         raise credentials_exception
     return user
 
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    return _user_from_token(token, db)
+
+def get_current_reader(token: str = Depends(oauth2_scheme), db: Session = Depends(get_read_db)):
+    # 읽기 전용 핸들러용: replica 세션에서 사용자 조회 (수정 금지)
+    return _user_from_token(token, db)
+
+def get_admin_user(current_user: User = Depends(get_current_reader)):
+    if current_user.email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="관리자만 접근 가능")
+    return current_user
+
+def get_token_payload(token: str = Depends(oauth2_scheme)):
+    # DB 조회 없이 access token 서명만 검증 (키 입력마다 호출되는 API용)
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], audience="mentor-mentee-client")
+    except JWTError:
+        payload = None
+    if not payload or not payload.get("sub") or payload.get("typ") == "refresh":
+        raise HTTPException(
+            status_code=401,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
 # --- 내 정보 조회 ---
-@app.get("/api/me")
-def get_me(current_user: User = Depends(get_current_user)):
+def user_response(user: User) -> dict:
+    # 명세에 맞는 전체 유저 정보
     profile = {
-        "name": current_user.name,
-        "bio": current_user.bio,
-        "imageUrl": f"/api/images/{current_user.role}/{current_user.id}",
+        "name": user.name,
+        "bio": user.bio,
+        "imageUrl": f"/api/images/{user.role}/{user.id}",
     }
-    if current_user.role == "mentor":
-        profile["skills"] = current_user.skills.split(",") if current_user.skills else []
+    if user.role == "mentor":
+        profile["skills"] = user.skills.split(",") if user.skills else []
+        profile["pendingCount"] = user.pending_count
+        profile["matched"] = user.is_matched
     return {
-        "id": current_user.id,
-        "email": current_user.email,
-        "role": current_user.role,
+        "id": user.id,
+        "email": user.email,
+        "role": user.role,
         "profile": profile,
     }
 
+@app.get("/api/me")
+def get_me(current_user: User = Depends(get_current_reader)):
+    return user_response(current_user)
+
 # --- 프로필 수정 ---
 class ProfileUpdateRequest(BaseModel):
     id: int
@@ -220,6 +888,66 @@ class ProfileUpdateRequest(BaseModel):
     image: Optional[str] = None  # base64 인코딩
     skills: Optional[List[str]] = None  # mentor만
 
+class ProfilePatchRequest(BaseModel):
+    # 보낸 필드만 수정 (image: null 이면 이미지 삭제)
+    name: Optional[str] = None
+    bio: Optional[str] = None
+    image: Optional[str] = None  # base64 인코딩
+    skills: Optional[List[str]] = None  # mentor만
+
+def make_thumbnail(data: bytes, ext: str) -> bytes:
+    img = Image.open(io.BytesIO(data))
+    if ext == "jpg":
+        # JPEG는 DCT 축소 디코딩으로 원본 크기 전체를 디코딩하지 않음
+        img.draft("RGB", (THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+    img.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+    out = io.BytesIO()
+    img.save(out, format="PNG" if ext == "png" else "JPEG")
+    return out.getvalue()
+
+def set_profile_image(user: User, image_b64: str):
+    # 저장된 이미지와 내용이 같으면 디코딩 결과를 다시 쓰지 않음
+    try:
+        img_data = base64.b64decode(image_b64)
+    except Exception:
+        raise HTTPException(status_code=400, detail="이미지 디코딩 실패")
+    if len(img_data) > 1024*1024:
+        raise HTTPException(status_code=400, detail="이미지 크기는 1MB 이하만 허용됩니다.")
+    image_hash = hashlib.sha256(img_data).hexdigest()
+    if image_hash == user.image_hash:
+        return
+    # jpg/png 판별
+    if img_data[:3] == b'\xff\xd8\xff':
+        user.image_type = 'jpg'
+    elif img_data[:8] == b'\x89PNG\r\n\x1a\n':
+        user.image_type = 'png'
+    else:
+        raise HTTPException(status_code=400, detail="jpg/png만 허용됩니다.")
+    thumbnail = None
+    if Image is not None:
+        # 헤더만 읽어 픽셀 크기 확인 후, 썸네일은 업로드 시 한 번만 생성 (조회 시에는 저장된 바이트만 제공)
+        try:
+            width, height = Image.open(io.BytesIO(img_data)).size
+        except Exception:
+            raise HTTPException(status_code=400, detail="이미지 디코딩 실패")
+        if width > IMAGE_MAX_DIMENSION or height > IMAGE_MAX_DIMENSION:
+            raise HTTPException(
+                status_code=400,
+                detail=f"이미지는 {IMAGE_MAX_DIMENSION}x{IMAGE_MAX_DIMENSION} 픽셀 이하만 허용됩니다.",
+            )
+        try:
+            thumbnail = make_thumbnail(img_data, user.image_type)
+        except Exception:
+            raise HTTPException(status_code=400, detail="이미지 디코딩 실패")
+    user.image = img_data
+    user.image_hash = image_hash
+    user.thumbnail = thumbnail
+
+def set_profile_skills(user: User, skills: List[str]):
+    old_skills = user.skills.split(",") if user.skills else []
+    user.skills = ",".join(skills)
+    return old_skills
+
 @app.put("/api/profile")
 def update_profile(
     req: ProfileUpdateRequest,
@@ -231,77 +959,111 @@ def update_profile(
     current_user.name = req.name
     current_user.bio = req.bio
     if req.image:
-        try:
-            img_data = base64.b64decode(req.image)
-            if len(img_data) > 1024*1024:
-                raise HTTPException(status_code=400, detail="이미지 크기는 1MB 이하만 허용됩니다.")
-            # jpg/png 판별
-            if img_data[:3] == b'\xff\xd8\xff':
-                current_user.image_type = 'jpg'
-            elif img_data[:8] == b'\x89PNG\r\n\x1a\n':
-                current_user.image_type = 'png'
-            else:
-                raise HTTPException(status_code=400, detail="jpg/png만 허용됩니다.")
-            current_user.image = img_data
-        except Exception:
-            raise HTTPException(status_code=400, detail="이미지 디코딩 실패")
+        set_profile_image(current_user, req.image)
     if current_user.role == "mentor":
-        current_user.skills = ",".join(req.skills or [])
+        old_skills = set_profile_skills(current_user, req.skills or [])
     db.commit()
-    db.refresh(current_user)
-    # 명세에 맞는 전체 유저 정보 반환
-    profile = {
-        "name": current_user.name,
-        "bio": current_user.bio,
-        "imageUrl": f"/api/images/{current_user.role}/{current_user.id}",
-    }
     if current_user.role == "mentor":
-        profile["skills"] = current_user.skills.split(",") if current_user.skills else []
-    return {
-        "id": current_user.id,
-        "email": current_user.email,
-        "role": current_user.role,
-        "profile": profile,
-    }
+        skill_index.update(old_skills, req.skills or [])
+    return user_response(current_user)
+
+@app.patch("/api/profile")
+def patch_profile(
+    req: ProfilePatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    # 변경된 컬럼만 UPDATE 되도록 요청에 포함된 필드만 반영
+    fields = req.model_dump(exclude_unset=True)
+    if "name" in fields and req.name is not None:
+        current_user.name = req.name
+    if "bio" in fields and req.bio is not None:
+        current_user.bio = req.bio
+    if "image" in fields:
+        if req.image:
+            set_profile_image(current_user, req.image)
+        elif current_user.image_type is not None:
+            current_user.image = None
+            current_user.image_type = None
+            current_user.image_hash = None
+            current_user.thumbnail = None
+    old_skills = None
+    if "skills" in fields and req.skills is not None:
+        if current_user.role != "mentor":
+            raise HTTPException(status_code=400, detail="멘토만 스킬을 설정할 수 있습니다.")
+        old_skills = set_profile_skills(current_user, req.skills)
+    db.commit()
+    if old_skills is not None:
+        skill_index.update(old_skills, req.skills)
+    return user_response(current_user)
 
 # --- 프로필 이미지 제공 ---
 @app.get("/api/images/{role}/{user_id}")
-def get_profile_image(role: str, user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id, User.role == role).first()
+def get_profile_image(
+    request: Request,
+    role: str,
+    user_id: int,
+    size: Optional[Literal["thumb"]] = Query(None),
+    db: Session = Depends(get_read_db),
+):
+    user = db.query(User).options(defer(User.image), defer(User.thumbnail)).filter(User.id == user_id, User.role == role).first()
     if not user:
         raise HTTPException(status_code=404, detail="사용자 없음")
-    if user.image:
-        ext = user.image_type or "jpg"
-        return FileResponse(
-            path=None,
-            content_type=f"image/{ext}",
-            filename=f"profile.{ext}",
-            headers={"Content-Disposition": f"inline; filename=profile.{ext}"},
-            media_type=f"image/{ext}",
-            background=None,
-            body=user.image,
+    cache_headers = {"Cache-Control": f"public, max-age={IMAGE_CACHE_SECONDS}"}
+    if user.image_type:
+        ext = user.image_type
+        if user.image_hash:
+            # 이미지 해시 기반 ETag: 바뀌지 않았으면 본문(최대 1MB)을 읽지 않고 304 응답
+            cache_headers["ETag"] = f'"{user.image_hash[:16]}-{size or "full"}"'
+            if request.headers.get("if-none-match") == cache_headers["ETag"]:
+                return Response(status_code=304, headers=cache_headers)
+        # 썸네일이 없는 (도입 이전) 이미지는 원본을 그대로 제공
+        body = (user.thumbnail if size == "thumb" else None) or user.image
+        return Response(
+            content=body,
+            media_type=f"image/{'jpeg' if ext == 'jpg' else ext}",
+            headers={"Content-Disposition": f"inline; filename=profile.{ext}", **cache_headers},
         )
     # 기본 이미지
+    dim = f"{THUMBNAIL_SIZE}x{THUMBNAIL_SIZE}" if size == "thumb" else "500x500"
     if role == "mentor":
-        return RedirectResponse("https://placehold.co/500x500.jpg?text=MENTOR")
+        return RedirectResponse(f"https://placehold.co/{dim}.jpg?text=MENTOR", headers=cache_headers)
     else:
-        return RedirectResponse("https://placehold.co/500x500.jpg?text=MENTEE")
+        return RedirectResponse(f"https://placehold.co/{dim}.jpg?text=MENTEE", headers=cache_headers)
 
 # --- 멘토 리스트 조회 (멘티 전용) ---
-from fastapi import Query
 @app.get("/api/mentors")
 def get_mentors(
+    request: Request,
     skill: Optional[str] = Query(None),
     order_by: Optional[str] = Query(None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    page: Optional[int] = Query(None, ge=1),
+    page_size: Optional[int] = Query(None, ge=1, le=MENTOR_PAGE_SIZE_MAX),
+    current_user: User = Depends(get_current_reader),
+    db: Session = Depends(get_read_db),
 ):
     if current_user.role != "mentee":
         raise HTTPException(status_code=403, detail="멘티만 접근 가능합니다.")
-    q = db.query(User).filter(User.role == "mentor")
+    # 목록에는 이미지/비밀번호 컬럼이 필요 없으므로 로드하지 않음
+    q = db.query(User).options(defer(User.image), defer(User.thumbnail), defer(User.hashed_password)).filter(User.role == "mentor")
     if skill:
         q = q.filter(User.skills.like(f"%{skill}%"))
-    mentors = q.all()
+    # 정렬은 DB에서 수행해야 페이지 단위 조회가 가능 (skills는 첫 번째 스킬 기준과 동일한 순서)
+    if order_by == "name":
+        q = q.order_by(User.name, User.id)
+    elif order_by == "skill":
+        q = q.order_by(User.skills, User.id)
+    elif order_by == "availability":
+        # 매칭 안 된 멘토 → 대기 요청 적은 순 (ix_users_availability)
+        q = q.order_by(User.is_matched, User.pending_count, User.id)
+    else:
+        q = q.order_by(User.id)
+    headers = {}
+    with profile_section("orm"):
+        if page_size:
+            headers["X-Total-Count"] = str(q.order_by(None).count())
+            q = q.offset(((page or 1) - 1) * page_size).limit(page_size)
+        mentors = q.all()
     def mentor_profile(u):
         return {
             "id": u.id,
@@ -312,16 +1074,20 @@ def get_mentors(
                 "bio": u.bio,
                 "imageUrl": f"/api/images/mentor/{u.id}",
                 "skills": u.skills.split(",") if u.skills else [],
+                "pendingCount": u.pending_count,
+                "matched": u.is_matched,
             },
         }
-    result = [mentor_profile(u) for u in mentors]
-    if order_by == "name":
-        result.sort(key=lambda x: x["profile"]["name"])
-    elif order_by == "skill":
-        result.sort(key=lambda x: (x["profile"]["skills"][0] if x["profile"]["skills"] else ""))
-    else:
-        result.sort(key=lambda x: x["id"])
-    return result
+    return negotiated_response(request, mentors, mentor_profile, headers)
+
+# --- 스킬 자동완성 (메모리 인덱스) ---
+@app.get("/api/skills/suggest")
+def suggest_skills(
+    prefix: str = Query("", max_length=50),
+    limit: int = Query(10, ge=1, le=50),
+    payload: dict = Depends(get_token_payload),
+):
+    return [{"skill": skill, "count": count} for skill, count in skill_index.suggest(prefix, limit)]
 
 # --- 매칭 요청 생성 (멘티 전용) ---
 class MatchRequestCreate(BaseModel):
@@ -355,6 +1121,9 @@ def create_match_request(
         status="pending",
     )
     db.add(match)
+    db.flush()
+    adjust_mentor_load(db, req.mentorId, pending_delta=1)
+    record_change(db, match)
     db.commit()
     db.refresh(match)
     return {
@@ -365,36 +1134,109 @@ def create_match_request(
         "status": match.status,
     }
 
+def to_utc_naive(dt: datetime) -> datetime:
+    # DB 시각 컬럼은 naive UTC로 저장되므로 offset이 있는 입력은 UTC로 변환 후 비교
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
 # --- 나에게 들어온 요청 목록 (멘토 전용) ---
+def list_match_requests(db: Session, owner: str, user_id: int, include, since, before):
+    # owner: "mentor_id" 또는 "mentee_id", 생성 시각 범위(since 이상, before 미만)로 필터
+    models = [MatchRequest, MatchRequestArchive] if include == "archived" else [MatchRequest]
+    reqs = []
+    for model in models:
+        q = db.query(model).filter(getattr(model, owner) == user_id)
+        if since:
+            q = q.filter(model.created_at >= to_utc_naive(since))
+        if before:
+            q = q.filter(model.created_at < to_utc_naive(before))
+        with profile_section("orm"):
+            reqs += q.all()
+    if len(models) > 1:
+        reqs.sort(key=lambda r: r.id)
+    return reqs
+
+def iso(dt: Optional[datetime]):
+    return dt.isoformat() if dt else None
+
 @app.get("/api/match-requests/incoming")
-def get_incoming_requests(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_incoming_requests(
+    request: Request,
+    include: Optional[Literal["archived"]] = Query(None),
+    since: Optional[datetime] = Query(None),
+    before: Optional[datetime] = Query(None),
+    current_user: User = Depends(get_current_reader),
+    db: Session = Depends(get_read_db),
+):
     if current_user.role != "mentor":
         raise HTTPException(status_code=403, detail="멘토만 접근 가능")
-    reqs = db.query(MatchRequest).filter(MatchRequest.mentor_id == current_user.id).all()
-    return [
-        {
-            "id": r.id,
-            "mentorId": r.mentor_id,
-            "menteeId": r.mentee_id,
-            "message": r.message,
-            "status": r.status,
-        } for r in reqs
-    ]
+    reqs = list_match_requests(db, "mentor_id", current_user.id, include, since, before)
+    return negotiated_response(request, reqs, lambda r: {
+        "id": r.id,
+        "mentorId": r.mentor_id,
+        "menteeId": r.mentee_id,
+        "message": r.message,
+        "status": r.status,
+        "createdAt": iso(r.created_at),
+        "updatedAt": iso(r.updated_at),
+    })
 
 # --- 내가 보낸 요청 목록 (멘티 전용) ---
 @app.get("/api/match-requests/outgoing")
-def get_outgoing_requests(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_outgoing_requests(
+    request: Request,
+    include: Optional[Literal["archived"]] = Query(None),
+    since: Optional[datetime] = Query(None),
+    before: Optional[datetime] = Query(None),
+    current_user: User = Depends(get_current_reader),
+    db: Session = Depends(get_read_db),
+):
     if current_user.role != "mentee":
         raise HTTPException(status_code=403, detail="멘티만 접근 가능")
-    reqs = db.query(MatchRequest).filter(MatchRequest.mentee_id == current_user.id).all()
-    return [
-        {
-            "id": r.id,
-            "mentorId": r.mentor_id,
-            "menteeId": r.mentee_id,
-            "status": r.status,
-        } for r in reqs
-    ]
+    reqs = list_match_requests(db, "mentee_id", current_user.id, include, since, before)
+    return negotiated_response(request, reqs, lambda r: {
+        "id": r.id,
+        "mentorId": r.mentor_id,
+        "menteeId": r.mentee_id,
+        "status": r.status,
+        "createdAt": iso(r.created_at),
+        "updatedAt": iso(r.updated_at),
+    })
+
+# --- 매칭 요청 변경분 조회 (delta-sync) ---
+@app.get("/api/match-requests/changes")
+def get_match_request_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=CHANGES_PAGE_SIZE_MAX),
+    current_user: User = Depends(get_current_reader),
+    db: Session = Depends(get_read_db),
+):
+    # since 이후 변경된 요청의 최신 상태만 반환, 다음 조회는 cursor부터
+    col = MatchRequestChange.mentor_id if current_user.role == "mentor" else MatchRequestChange.mentee_id
+    rows = db.query(MatchRequestChange).filter(
+        col == current_user.id,
+        MatchRequestChange.id > since,
+    ).order_by(MatchRequestChange.id).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    latest = {}
+    for c in rows:
+        latest.pop(c.request_id, None)
+        latest[c.request_id] = c
+    return {
+        "changes": [
+            {
+                "id": c.request_id,
+                "mentorId": c.mentor_id,
+                "menteeId": c.mentee_id,
+                "message": c.message,
+                "status": c.status,
+            } for c in latest.values()
+        ],
+        "cursor": rows[-1].id if rows else since,
+        "hasMore": has_more,
+    }
 
 # --- 요청 수락 (멘토 전용) ---
 @app.put("/api/match-requests/{req_id}/accept")
@@ -412,7 +1254,15 @@ def accept_request(req_id: int, current_user: User = Depends(get_current_user),
     ).all()
     for o in others:
         o.status = "rejected"
+        o.closed_at = datetime.utcnow()
+        record_change(db, o)
+    adjust_mentor_load(
+        db, current_user.id,
+        pending_delta=-(len(others) + (1 if req.status == "pending" else 0)),
+        matched=True,
+    )
     req.status = "accepted"
+    record_change(db, req)
     db.commit()
     db.refresh(req)
     return {
@@ -431,7 +1281,10 @@ def reject_request(req_id: int, current_user: User = Depends(get_current_user),
     req = db.query(MatchRequest).filter(MatchRequest.id == req_id, MatchRequest.mentor_id == current_user.id).first()
     if not req:
         raise HTTPException(status_code=404, detail="요청 없음")
+    release_mentor_load(db, req)
     req.status = "rejected"
+    req.closed_at = datetime.utcnow()
+    record_change(db, req)
     db.commit()
     db.refresh(req)
     return {
@@ -450,7 +1303,10 @@ def cancel_request(req_id: int, current_user: User = Depends(get_current_user),
     req = db.query(MatchRequest).filter(MatchRequest.id == req_id, MatchRequest.mentee_id == current_user.id).first()
     if not req:
         raise HTTPException(status_code=404, detail="요청 없음")
+    release_mentor_load(db, req)
     req.status = "cancelled"
+    req.closed_at = datetime.utcnow()
+    record_change(db, req)
     db.commit()
     db.refresh(req)
     return {
@@ -461,6 +1317,271 @@ def cancel_request(req_id: int, current_user: User = Depends(get_current_user),
         "status": req.status,
     }
 
+# --- 데이터 내보내기 (관리자 전용, 스트리밍) ---
+EXPORT_USER_COLUMNS = [User.id, User.email, User.name, User.role, User.bio, User.skills, User.pending_count, User.is_matched]
+EXPORT_MATCH_REQUEST_COLUMNS = ["id", "mentor_id", "mentee_id", "message", "status", "created_at", "updated_at", "closed_at"]
+
+def stream_export(make_stmt, fmt: str, since_id: int = 0):
+    # id 기준 keyset 페이지네이션: EXPORT_CHUNK_SIZE 행마다 짧은 트랜잭션으로 조회
+    # (다운로드가 느려도 읽기 트랜잭션을 열어두지 않으므로 SQLite에서도 쓰기를 막지 않음)
+    last_id = since_id
+    first = True
+    while True:
+        db = ReadSessionLocal()
+        try:
+            result = db.execute(make_stmt(last_id).limit(EXPORT_CHUNK_SIZE))
+            keys = list(result.keys())
+            rows = result.all()
+        finally:
+            db.close()
+        buf = io.StringIO()
+        if fmt == "csv":
+            writer = csv.writer(buf)
+            if first:
+                writer.writerow(keys)
+            writer.writerows(rows)
+        else:
+            for row in rows:
+                buf.write(json.dumps(dict(zip(keys, row)), ensure_ascii=False, default=str))
+                buf.write("\n")
+        first = False
+        if buf.tell():
+            yield buf.getvalue()
+        if len(rows) < EXPORT_CHUNK_SIZE:
+            break
+        last_id = rows[-1].id
+
+def export_response(make_stmt, fmt: str, name: str, since_id: int = 0):
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    ext = "csv" if fmt == "csv" else "ndjson"
+    return StreamingResponse(
+        stream_export(make_stmt, fmt, since_id),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={name}.{ext}"},
+    )
+
+@app.get("/api/export/users")
+def export_users(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    since: int = Query(0, ge=0, description="이 id 이후의 사용자만"),
+    admin: User = Depends(get_admin_user),
+):
+    # 이미지/비밀번호 컬럼은 조회하지 않음
+    def make_stmt(after_id):
+        return select(*EXPORT_USER_COLUMNS).where(User.id > after_id).order_by(User.id)
+    return export_response(make_stmt, format, "users", since)
+
+@app.get("/api/export/match-requests")
+def export_match_requests(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    since: Union[int, datetime] = Query(0, description="이 id 이후, 또는 이 시각(ISO) 이후 생성된 요청만"),
+    include: Optional[Literal["archived"]] = Query(None),
+    admin: User = Depends(get_admin_user),
+):
+    since_id = since if isinstance(since, int) else 0
+    created_since = to_utc_naive(since) if isinstance(since, datetime) else None
+
+    def part(model, after_id):
+        q = select(*[getattr(model, c) for c in EXPORT_MATCH_REQUEST_COLUMNS]).where(model.id > after_id)
+        if created_since:
+            q = q.where(model.created_at >= created_since)
+        return q
+
+    def make_stmt(after_id):
+        if include == "archived":
+            return part(MatchRequest, after_id).union_all(part(MatchRequestArchive, after_id)).order_by("id")
+        return part(MatchRequest, after_id).order_by(MatchRequest.id)
+    return export_response(make_stmt, format, "match_requests", since_id)
+
+# --- 요청 프로파일 조회 (관리자 전용) ---
+@app.get("/api/admin/profiles")
+def list_profiles(admin: User = Depends(get_admin_user)):
+    with _recent_profiles_lock:
+        profiles = list(recent_profiles.values())
+    return [p.summary() for p in reversed(profiles)]
+
+@app.get("/api/admin/profiles/{profile_id}")
+def get_profile(
+    profile_id: str,
+    format: Literal["json", "collapsed"] = Query("json"),
+    admin: User = Depends(get_admin_user),
+):
+    prof = recent_profiles.get(profile_id)
+    if not prof:
+        raise HTTPException(status_code=404, detail="프로파일 없음")
+    if format == "collapsed":
+        # flamegraph.pl / speedscope 에 바로 넣을 수 있는 형식
+        return PlainTextResponse(prof.collapsed())
+    return {**prof.summary(), "stacks": dict(prof.stacks.most_common())}
+
+# --- 거절/취소 요청 아카이빙 (백그라운드) ---
+def archive_match_requests_batch(db: Session, cutoff: datetime, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    # cutoff 이전에 종료된 요청을 한 배치만 archive 테이블로 옮기고 옮긴 개수를 반환
+    rows = db.query(MatchRequest).filter(
+        MatchRequest.status.in_(TERMINAL_STATUSES),
+        MatchRequest.closed_at < cutoff,
+    ).order_by(MatchRequest.closed_at).limit(batch_size).all()
+    if not rows:
+        return 0
+    now = datetime.utcnow()
+    for r in rows:
+        db.merge(MatchRequestArchive(
+            id=r.id,
+            mentor_id=r.mentor_id,
+            mentee_id=r.mentee_id,
+            message=r.message,
+            status=r.status,
+            closed_at=r.closed_at,
+            created_at=r.created_at,
+            updated_at=r.updated_at,
+            archived_at=now,
+        ))
+        db.delete(r)
+    db.commit()
+    return len(rows)
+
+def run_batches(batch, batch_size: int, pause: float, stop: Optional[threading.Event] = None) -> int:
+    # 배치 사이에 쉬어가며 (live 트래픽 방해 최소화) 대상이 없을 때까지 반복
+    total = 0
+    db = SessionLocal()
+    try:
+        while True:
+            done = batch(db)
+            total += done
+            if done < batch_size or (stop and stop.wait(pause)):
+                break
+    finally:
+        db.close()
+    return total
+
+def archive_match_requests(stop: Optional[threading.Event] = None) -> int:
+    cutoff = datetime.utcnow() - timedelta(days=ARCHIVE_RETENTION_DAYS)
+    return run_batches(lambda db: archive_match_requests_batch(db, cutoff), ARCHIVE_BATCH_SIZE, ARCHIVE_BATCH_PAUSE_SECONDS, stop)
+
+def archiver_job(stop: threading.Event):
+    while not stop.is_set():
+        try:
+            moved = archive_match_requests(stop)
+            if moved:
+                logger.info("archived %d match requests", moved)
+        except Exception:
+            logger.exception("match request archiving failed")
+        stop.wait(ARCHIVE_INTERVAL_SECONDS)
+
+if ARCHIVER_ENABLED:
+    background_jobs.append(("match-request-archiver", archiver_job))
+
+# --- 오래된 pending 요청 만료 (백그라운드) ---
+def expire_pending_requests_batch(db: Session, cutoff: datetime, batch_size: int = EXPIRY_BATCH_SIZE) -> int:
+    # cutoff 이전에 생성된 pending 요청 한 배치를 expired로 바꾸고 실제로 바꾼 개수를 반환
+    # PostgreSQL에서는 처리 중인 행을 잠그고, 다른 트랜잭션이 잠근 행(수락/취소 중)은 건너뜀
+    rows = db.query(MatchRequest).filter(
+        MatchRequest.status == "pending",
+        MatchRequest.created_at < cutoff,
+    ).order_by(MatchRequest.created_at).limit(batch_size).with_for_update(skip_locked=True).all()
+    now = datetime.utcnow()
+    count = 0
+    for r in rows:
+        # 조회 이후 수락/취소된 요청은 상태를 덮어쓰거나 카운터를 두 번 차감하지 않도록 조건부 UPDATE
+        expired = db.query(MatchRequest).filter(
+            MatchRequest.id == r.id,
+            MatchRequest.status == "pending",
+        ).update(
+            {MatchRequest.status: "expired", MatchRequest.closed_at: now, MatchRequest.updated_at: now},
+            synchronize_session=False,
+        )
+        if not expired:
+            continue
+        adjust_mentor_load(db, r.mentor_id, pending_delta=-1)
+        db.expire(r)
+        record_change(db, r)
+        count += 1
+    db.commit()
+    return count
+
+def expire_pending_requests(stop: Optional[threading.Event] = None) -> int:
+    cutoff = datetime.utcnow() - timedelta(days=PENDING_REQUEST_TTL_DAYS)
+    return run_batches(lambda db: expire_pending_requests_batch(db, cutoff), EXPIRY_BATCH_SIZE, EXPIRY_BATCH_PAUSE_SECONDS, stop)
+
+def expiry_job(stop: threading.Event):
+    while not stop.is_set():
+        try:
+            expired = expire_pending_requests(stop)
+            if expired:
+                logger.info("expired %d pending match requests", expired)
+        except Exception:
+            logger.exception("pending request expiry failed")
+        stop.wait(EXPIRY_INTERVAL_SECONDS)
+
+if EXPIRY_ENABLED:
+    background_jobs.append(("pending-request-expiry", expiry_job))
+
+# --- 멘토 카운터 재계산 (백그라운드) ---
+def mentor_counter_repair_job(stop: threading.Event):
+    while not stop.wait(MENTOR_COUNTER_REPAIR_INTERVAL_SECONDS):
+        db = SessionLocal()
+        try:
+            fixed = repair_mentor_counters(db)
+            if fixed:
+                logger.warning("repaired load counters of %d mentors", fixed)
+        except Exception:
+            logger.exception("mentor counter repair failed")
+        finally:
+            db.close()
+
+background_jobs.append(("mentor-counter-repair", mentor_counter_repair_job))
+
+# --- 만료된 refresh token 정리 (백그라운드) ---
+def prune_refresh_tokens_batch(db: Session, now: datetime, batch_size: int = REFRESH_TOKEN_PRUNE_BATCH_SIZE) -> int:
+    # 만료 시각이 지난 refresh token 한 배치를 삭제하고 개수를 반환 (만료된 토큰은 서명 검증에서 이미 거부됨)
+    ids = [i for (i,) in db.query(RefreshToken.id).filter(RefreshToken.expires_at < now).limit(batch_size)]
+    if ids:
+        db.query(RefreshToken).filter(RefreshToken.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+    return len(ids)
+
+def prune_refresh_tokens(stop: Optional[threading.Event] = None) -> int:
+    now = datetime.utcnow()
+    return run_batches(lambda db: prune_refresh_tokens_batch(db, now), REFRESH_TOKEN_PRUNE_BATCH_SIZE, ARCHIVE_BATCH_PAUSE_SECONDS, stop)
+
+def refresh_token_pruner_job(stop: threading.Event):
+    while not stop.wait(REFRESH_TOKEN_PRUNE_INTERVAL_SECONDS):
+        try:
+            pruned = prune_refresh_tokens(stop)
+            if pruned:
+                logger.info("pruned %d expired refresh tokens", pruned)
+        except Exception:
+            logger.exception("refresh token pruning failed")
+
+background_jobs.append(("refresh-token-pruner", refresh_token_pruner_job))
+
+# --- 기존 이미지 해시 채우기 (백그라운드, 1회) ---
+def backfill_image_hashes_batch(db: Session, batch_size: int = IMAGE_HASH_BACKFILL_BATCH_SIZE) -> int:
+    # 해시가 없는 이미지 한 배치를 처리 (이미지는 한 행씩만 로드, 여러 워커가 동시에 실행해도 결과 동일)
+    ids = [i for (i,) in db.query(User.id).filter(User.image.isnot(None), User.image_hash.is_(None)).limit(batch_size)]
+    for user_id in ids:
+        image = db.query(User.image).filter(User.id == user_id).scalar()
+        if image is None:
+            continue
+        db.query(User).filter(User.id == user_id, User.image_hash.is_(None)).update(
+            {User.image_hash: hashlib.sha256(image).hexdigest()}, synchronize_session=False
+        )
+        db.commit()
+    return len(ids)
+
+def backfill_image_hashes(stop: Optional[threading.Event] = None) -> int:
+    return run_batches(backfill_image_hashes_batch, IMAGE_HASH_BACKFILL_BATCH_SIZE, ARCHIVE_BATCH_PAUSE_SECONDS, stop)
+
+def image_hash_backfill_job(stop: threading.Event):
+    try:
+        filled = backfill_image_hashes(stop)
+        if filled:
+            logger.info("backfilled image hashes of %d users", filled)
+    except Exception:
+        logger.exception("image hash backfill failed")
+
+background_jobs.append(("image-hash-backfill", image_hash_backfill_job))
+
 from fastapi.exception_handlers import RequestValidationError
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError as FastAPIRequestValidationError
@@ -0,0 +1,142 @@
+"""
+pytest 공용 fixture
+- 테스트마다 독립된 in-memory SQLite DB를 만들고 get_db/get_read_db를 override
+- TEST_DATABASE_URL(PostgreSQL)을 지정하면 xdist 워커별 schema에서 테스트마다 테이블을 새로 생성
+- 서버 없이 TestClient(ASGI in-process)로 API 호출 → pytest-xdist 병렬 실행 가능
+"""
+import os
+
+# backend_code import 시 create_all/ALTER/backfill이 실행되므로 셸에 설정된 운영 DB URL은 무시
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ.pop("DATABASE_REPLICA_URL", None)
+os.environ.setdefault("ARCHIVER_ENABLED", "0")
+os.environ.setdefault("EXPIRY_ENABLED", "0")
+
+import pytest
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import backend_code as app_module
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL") or None
+
+
+def make_test_engine():
+    if not TEST_DATABASE_URL:
+        return create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+    # xdist 워커마다 별도 schema를 써서 병렬 실행 시에도 서로의 테이블을 건드리지 않음
+    schema = "test_" + os.getenv("PYTEST_XDIST_WORKER", "main")
+    admin = create_engine(TEST_DATABASE_URL)
+    with admin.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+    admin.dispose()
+    engine = create_engine(TEST_DATABASE_URL, connect_args={"options": f"-csearch_path={schema}"})
+    app_module.Base.metadata.drop_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def db_sessionmaker(monkeypatch):
+    engine = make_test_engine()
+    app_module.Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    # 핸들러 밖에서 세션을 직접 여는 코드(export, 아카이빙 등)도 같은 DB를 보도록 교체
+    monkeypatch.setattr(app_module, "SessionLocal", factory)
+    monkeypatch.setattr(app_module, "ReadSessionLocal", factory)
+    # 백그라운드 작업(만료/카운터 재계산/토큰 정리 등)은 테스트 스레드와 경쟁하지 않도록 실행하지 않음
+    # (필요한 테스트는 archive_match_requests() 등을 직접 호출)
+    monkeypatch.setattr(app_module, "background_jobs", [])
+    # bcrypt 비용을 낮춰 회원가입/로그인 테스트 속도 개선
+    monkeypatch.setattr(app_module, "pwd_context", CryptContext(schemes=["bcrypt"], bcrypt__rounds=4))
+    yield factory
+    if TEST_DATABASE_URL:
+        app_module.Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(db_sessionmaker):
+    session = db_sessionmaker()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(db_sessionmaker):
+    def override_get_db():
+        session = db_sessionmaker()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app_module.app.dependency_overrides[app_module.get_db] = override_get_db
+    app_module.app.dependency_overrides[app_module.get_read_db] = override_get_db
+    with TestClient(app_module.app) as c:
+        yield c
+    app_module.app.dependency_overrides.clear()
+
+
+def auth_headers(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def make_user(db):
+    """사용자를 DB에 직접 만들고 (user, access token)을 반환하는 factory"""
+    counter = {"n": 0}
+
+    def factory(role, name=None, email=None, skills="", bio=""):
+        counter["n"] += 1
+        user = app_module.User(
+            email=email or f"{role}{counter['n']}@test.com",
+            hashed_password="!",  # 로그인 테스트는 /api/signup 사용
+            name=name or f"{role}{counter['n']}",
+            role=role,
+            bio=bio,
+            skills=skills,
+        )
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        token = app_module.create_access_token({
+            "sub": str(user.id),
+            "email": user.email,
+            "role": user.role,
+            "name": user.name,
+        })
+        return user, token
+
+    return factory
+
+
+@pytest.fixture
+def make_mentor(make_user):
+    return lambda **kw: make_user("mentor", **kw)
+
+
+@pytest.fixture
+def make_mentee(make_user):
+    return lambda **kw: make_user("mentee", **kw)
+
+
+@pytest.fixture
+def make_request(client):
+    """멘티 토큰으로 매칭 요청을 보내고 응답 JSON을 반환하는 factory"""
+    def factory(mentee, mentee_token, mentor, message="멘토링 요청합니다!"):
+        r = client.post(
+            "/api/match-requests",
+            json={"mentorId": mentor.id, "menteeId": mentee.id, "message": message},
+            headers=auth_headers(mentee_token),
+        )
+        assert r.status_code == 200, r.text
+        return r.json()
+
+    return factory
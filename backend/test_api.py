@@ -1,111 +1,503 @@
-import requests
+"""
+멘토-멘티 API 테스트 (in-process, 테스트마다 독립 DB)
+
+    cd backend && pytest -q          # 전체
+    cd backend && pytest -q -n auto  # pytest-xdist 병렬 실행
+"""
 import base64
+import io
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import msgpack
+from PIL import Image
+from sqlalchemy import create_engine, event
 
-API = "http://localhost:8080/api"
+import backend_code as app_module
 
-MENTOR_EMAIL = "mentor_test@test.com"
-MENTEE_EMAIL = "mentee_test@test.com"
 PASSWORD = "test1234"
 
 
-def test_signup():
-    # 멘토 회원가입
-    r = requests.post(f"{API}/signup", json={
-        "email": MENTOR_EMAIL,
-        "password": PASSWORD,
-        "name": "테스트멘토",
-        "role": "mentor"
-    })
-    assert r.status_code in (201, 400)
-    # 멘티 회원가입
-    r = requests.post(f"{API}/signup", json={
-        "email": MENTEE_EMAIL,
-        "password": PASSWORD,
-        "name": "테스트멘티",
-        "role": "mentee"
+def auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def image_b64(size, fmt):
+    buf = io.BytesIO()
+    Image.new("RGB", size, "red").save(buf, format=fmt)
+    return base64.b64encode(buf.getvalue()).decode()
+
+
+def signup_and_login(client, email, role, name="테스트"):
+    r = client.post("/api/signup", json={"email": email, "password": PASSWORD, "name": name, "role": role})
+    assert r.status_code == 201
+    r = client.post("/api/login", data={"username": email, "password": PASSWORD})
+    assert r.status_code == 200
+    return r.json()
+
+
+# --- 인증 ---
+def test_signup_duplicate_email(client):
+    signup_and_login(client, "mentor_test@test.com", "mentor")
+    r = client.post("/api/signup", json={"email": "mentor_test@test.com", "password": PASSWORD, "name": "x", "role": "mentor"})
+    assert r.status_code == 400
+
+
+def test_login_json_and_wrong_password(client):
+    signup_and_login(client, "mentee_test@test.com", "mentee")
+    r = client.post("/api/login", json={"email": "mentee_test@test.com", "password": PASSWORD})
+    assert r.status_code == 200
+    r = client.post("/api/login", data={"username": "mentee_test@test.com", "password": "wrong"})
+    assert r.status_code == 401
+
+
+def test_refresh_token_rotation(client):
+    tokens = signup_and_login(client, "mentee_test@test.com", "mentee")
+    r = client.post("/api/token/refresh", json={"refreshToken": tokens["refreshToken"]})
+    assert r.status_code == 200
+    rotated = r.json()
+    assert client.get("/api/me", headers=auth(rotated["token"])).status_code == 200
+    # refresh token은 access token으로 쓸 수 없음
+    assert client.get("/api/me", headers=auth(tokens["refreshToken"])).status_code == 401
+    # 이미 회전된 토큰 재사용 시 해당 사용자의 refresh token 전부 폐기
+    assert client.post("/api/token/refresh", json={"refreshToken": tokens["refreshToken"]}).status_code == 401
+    assert client.post("/api/token/refresh", json={"refreshToken": rotated["refreshToken"]}).status_code == 401
+
+
+def test_logout_revokes_refresh_token(client):
+    tokens = signup_and_login(client, "mentee_test@test.com", "mentee")
+    assert client.post("/api/token/revoke", json={"refreshToken": tokens["refreshToken"]}).status_code == 204
+    assert client.post("/api/token/refresh", json={"refreshToken": tokens["refreshToken"]}).status_code == 401
+    # 로그아웃은 여러 번 호출해도 안전
+    assert client.post("/api/token/revoke", json={"refreshToken": tokens["refreshToken"]}).status_code == 204
+    assert client.post("/api/token/revoke", json={"refreshToken": tokens["token"]}).status_code == 401
+
+
+def test_refresh_token_concurrent_rotation(client, db, monkeypatch):
+    tokens = signup_and_login(client, "mentee_test@test.com", "mentee")
+    # 다른 요청이 같은 토큰을 먼저 회전시킨 상황: jti 조회 시점엔 revoked=False 였지만 UPDATE 직전에 폐기됨
+    real_query = app_module.Session.query
+
+    def racing_query(self, *entities, **kw):
+        if entities[:1] == (app_module.User,):
+            db.query(app_module.RefreshToken).update({app_module.RefreshToken.revoked: True})
+            db.commit()
+        return real_query(self, *entities, **kw)
+
+    monkeypatch.setattr(app_module.Session, "query", racing_query)
+    r = client.post("/api/token/refresh", json={"refreshToken": tokens["refreshToken"]})
+    monkeypatch.undo()
+    assert r.status_code == 401
+    assert db.query(app_module.RefreshToken).count() == 1
+
+
+def test_prune_expired_refresh_tokens(client, db):
+    signup_and_login(client, "mentee_test@test.com", "mentee")
+    signup_and_login(client, "mentor_test@test.com", "mentor")
+    db.query(app_module.RefreshToken).filter(app_module.RefreshToken.user_id == 1).update(
+        {app_module.RefreshToken.expires_at: datetime.utcnow() - timedelta(days=1)}
+    )
+    db.commit()
+    assert app_module.prune_refresh_tokens() == 1
+    assert db.query(app_module.RefreshToken.user_id).all() == [(2,)]
+
+
+# --- 프로필 ---
+def test_me_and_profile_update(client, make_mentor):
+    mentor, token = make_mentor()
+    r = client.put("/api/profile", headers=auth(token), json={
+        "id": mentor.id, "name": "수정된이름", "role": "mentor", "bio": "자기소개 수정",
+        "image": None, "skills": ["python", "fastapi"],
     })
-    assert r.status_code in (201, 400)
+    assert r.status_code == 200
+    me = client.get("/api/me", headers=auth(token)).json()
+    assert me["profile"]["name"] == "수정된이름"
+    assert me["profile"]["skills"] == ["python", "fastapi"]
 
-def test_login():
-    # 멘토 로그인
-    r = requests.post(f"{API}/login", data={"username": MENTOR_EMAIL, "password": PASSWORD})
+
+def test_patch_profile_partial_and_unchanged_image(client, db, make_mentor):
+    mentor, token = make_mentor(bio="old", skills="go")
+    png = image_b64((8, 8), "PNG")
+    r = client.patch("/api/profile", headers=auth(token), json={"bio": "new", "image": png})
     assert r.status_code == 200
-    mentor_token = r.json()["token"]
-    # 멘티 로그인
-    r = requests.post(f"{API}/login", data={"username": MENTEE_EMAIL, "password": PASSWORD})
+    assert r.json()["profile"]["bio"] == "new"
+    assert r.json()["profile"]["skills"] == ["go"]
+    # 같은 이미지를 다시 보내면 users 행의 image 컬럼을 다시 쓰지 않음
+    statements = []
+    listener = lambda conn, cursor, stmt, *args: statements.append(stmt)
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        r = client.patch("/api/profile", headers=auth(token), json={"image": png, "skills": ["go", "rust"]})
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    assert r.json()["profile"]["skills"] == ["go", "rust"]
+    updates = [s for s in statements if s.startswith("UPDATE users")]
+    assert updates and all("image" not in s for s in updates)
+    r = client.get(f"/api/images/mentor/{mentor.id}")
     assert r.status_code == 200
-    mentee_token = r.json()["token"]
-    return mentor_token, mentee_token
+    r = client.get(f"/api/images/mentor/{mentor.id}", headers={"If-None-Match": r.headers["ETag"]})
+    assert r.status_code == 304
+    r = client.patch("/api/profile", headers=auth(token), json={"image": None})
+    assert client.get(f"/api/images/mentor/{mentor.id}", follow_redirects=False).status_code in (302, 307)
+
 
-def get_user_id(token):
-    headers = {"Authorization": f"Bearer {token}"}
-    r = requests.get(f"{API}/me", headers=headers)
+def test_profile_thumbnail_built_at_upload(client, db, make_mentor):
+    mentor, token = make_mentor()
+    r = client.patch("/api/profile", headers=auth(token), json={"image": image_b64((300, 200), "JPEG")})
     assert r.status_code == 200
-    return r.json()["id"]
-
-def test_profile_update(token, role, user_id):
-    # 프로필 수정 (멘토/멘티)
-    headers = {"Authorization": f"Bearer {token}"}
-    payload = {
-        "id": user_id,
-        "name": "수정된이름",
-        "role": role,
-        "bio": "자기소개 수정",
-        "image": None,
-    }
-    if role == "mentor":
-        payload["skills"] = ["python", "fastapi"]
-    r = requests.put(f"{API}/profile", json=payload, headers=headers)
+    # 썸네일 조회는 업로드 때 저장한 바이트만 읽고 원본 이미지 컬럼은 조회하지 않음
+    statements = []
+    listener = lambda conn, cursor, stmt, *args: statements.append(stmt)
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        r = client.get(f"/api/images/mentor/{mentor.id}", params={"size": "thumb"})
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    assert r.status_code == 200 and r.headers["content-type"] == "image/jpeg"
+    assert max(Image.open(io.BytesIO(r.content)).size) == app_module.THUMBNAIL_SIZE
+    assert statements and all("users.image " not in s and "users.image," not in s for s in statements)
+
+
+def test_profile_image_pixel_limit(client, make_mentor, monkeypatch):
+    mentor, token = make_mentor()
+    monkeypatch.setattr(app_module, "IMAGE_MAX_DIMENSION", 100)
+    r = client.patch("/api/profile", headers=auth(token), json={"image": image_b64((300, 50), "PNG")})
+    assert r.status_code == 400
+    r = client.patch("/api/profile", headers=auth(token), json={"image": image_b64((100, 100), "PNG")})
     assert r.status_code == 200
 
-def test_mentor_list(mentee_token):
-    headers = {"Authorization": f"Bearer {mentee_token}"}
-    r = requests.get(f"{API}/mentors", headers=headers)
+
+def test_profile_image_default_redirect(client, make_mentee):
+    mentee, token = make_mentee()
+    r = client.get(f"/api/images/mentee/{mentee.id}", follow_redirects=False)
+    assert r.status_code in (302, 307)
+
+
+# --- 멘토 리스트 ---
+def test_mentor_list_mentee_only(client, make_mentor, make_mentee):
+    _, mentor_token = make_mentor()
+    _, mentee_token = make_mentee()
+    assert client.get("/api/mentors", headers=auth(mentor_token)).status_code == 403
+    r = client.get("/api/mentors", headers=auth(mentee_token))
     assert r.status_code == 200
-    assert isinstance(r.json(), list)
-    return r.json()
+    assert len(r.json()) == 1
+
+
+def test_mentor_list_pagination_and_filter(client, make_mentor, make_mentee):
+    for i in range(5):
+        make_mentor(name=f"멘토{4 - i}", skills="python" if i % 2 == 0 else "go")
+    _, token = make_mentee()
+    r = client.get("/api/mentors", headers=auth(token), params={"order_by": "name", "page": 2, "page_size": 2})
+    assert r.headers["X-Total-Count"] == "5"
+    assert [m["profile"]["name"] for m in r.json()] == ["멘토2", "멘토3"]
+    r = client.get("/api/mentors", headers=auth(token), params={"skill": "go"})
+    assert len(r.json()) == 2
+
+
+def test_mentor_list_msgpack_and_compression(client, make_mentor, make_mentee):
+    for i in range(30):
+        make_mentor(bio="긴 소개 " * 20, skills="python,fastapi")
+    _, token = make_mentee()
+    r = client.get("/api/mentors", headers={**auth(token), "Accept": "application/msgpack", "Accept-Encoding": "gzip"})
+    assert r.headers["content-type"] == "application/msgpack"
+    assert r.headers["content-encoding"] == "gzip"
+    mentors = msgpack.unpackb(r.content)  # httpx가 gzip은 자동 해제
+    assert len(mentors) == 30 and mentors[0]["profile"]["skills"] == ["python", "fastapi"]
+    # 이미 압축된 응답은 GZipMiddleware가 다시 압축하지 않음
+    r = client.get("/api/mentors", headers={**auth(token), "Accept-Encoding": "br, gzip"})
+    assert r.headers["content-encoding"] == "br"
+    assert r.json() == mentors
+    # q=0으로 거부한 타입/인코딩은 사용하지 않음
+    r = client.get("/api/mentors", headers={
+        **auth(token), "Accept": "application/json, application/msgpack;q=0", "Accept-Encoding": "br;q=0, gzip",
+    })
+    assert r.headers["content-type"] == "application/json"
+    assert r.headers["content-encoding"] == "gzip"
+    r = client.get("/api/mentors", headers={**auth(token), "Accept-Encoding": "gzip;q=0.5, br"})
+    assert r.headers["content-encoding"] == "br"
+    r = client.get("/api/mentors", headers={**auth(token), "Accept-Encoding": "*;q=0"})
+    assert "content-encoding" not in r.headers
+    r = client.get("/api/mentors", headers={**auth(token), "Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers
+    assert r.json() == mentors
+
+
+def test_backfill_image_hashes(client, db, make_mentor):
+    mentor, token = make_mentor()
+    client.patch("/api/profile", headers=auth(token), json={"image": image_b64((8, 8), "PNG")})
+    expected = db.query(app_module.User.image_hash).filter(app_module.User.id == mentor.id).scalar()
+    db.query(app_module.User).update({app_module.User.image_hash: None})
+    db.commit()
+    assert app_module.backfill_image_hashes() == 1
+    assert db.query(app_module.User.image_hash).filter(app_module.User.id == mentor.id).scalar() == expected
+    assert app_module.backfill_image_hashes() == 0
+
+
+# --- 마이그레이션 ---
+def test_ensure_columns_tolerates_concurrent_migration(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/migrate.db")
+    monkeypatch.setattr(app_module, "engine", engine)
+    app_module.MatchRequestArchive.__table__.create(engine)
+    real_inspect = app_module.inspect
+    stale = []
+
+    def racing_inspect(bind):
+        inspector = real_inspect(bind)
+        if stale:
+            return inspector
+        # 첫 조회 시점에는 컬럼이 없었고, ALTER 직전에 다른 워커가 먼저 추가한 상황
+        stale.append(True)
+        columns = [c for c in inspector.get_columns("match_requests_archive") if c["name"] != "created_at"]
+        return SimpleNamespace(get_columns=lambda name: columns)
+
+    monkeypatch.setattr(app_module, "inspect", racing_inspect)
+    assert app_module.ensure_columns(app_module.MatchRequestArchive, {"created_at": "TIMESTAMP"}) == ["created_at"]
+    engine.dispose()
+
+
+# --- 매칭 요청 ---
+def test_match_request_flow(client, make_mentor, make_mentee, make_request):
+    mentor, mentor_token = make_mentor()
+    mentee1, token1 = make_mentee()
+    mentee2, token2 = make_mentee()
+    req1 = make_request(mentee1, token1, mentor)
+    req2 = make_request(mentee2, token2, mentor)
+    # 중복 pending 요청 방지
+    r = client.post("/api/match-requests", headers=auth(token1),
+                    json={"mentorId": mentor.id, "menteeId": mentee1.id, "message": "again"})
+    assert r.status_code == 400
+    assert len(client.get("/api/match-requests/incoming", headers=auth(mentor_token)).json()) == 2
+    # 한 명 수락 시 나머지는 자동 거절
+    r = client.put(f"/api/match-requests/{req1['id']}/accept", headers=auth(mentor_token))
+    assert r.json()["status"] == "accepted"
+    outgoing = client.get("/api/match-requests/outgoing", headers=auth(token2)).json()
+    assert [(r["id"], r["mentorId"], r["menteeId"], r["status"]) for r in outgoing] == [
+        (req2["id"], mentor.id, mentee2.id, "rejected")
+    ]
+
+
+def test_mentor_load_counters(client, db, make_mentor, make_mentee, make_request):
+    mentor, mentor_token = make_mentor()
+    (m1, t1), (m2, t2), (m3, t3) = make_mentee(), make_mentee(), make_mentee()
+    reqs = [make_request(m, t, mentor) for m, t in ((m1, t1), (m2, t2), (m3, t3))]
+    profile = client.get("/api/me", headers=auth(mentor_token)).json()["profile"]
+    assert (profile["pendingCount"], profile["matched"]) == (3, False)
+    client.delete(f"/api/match-requests/{reqs[2]['id']}", headers=auth(t3))
+    client.put(f"/api/match-requests/{reqs[0]['id']}/accept", headers=auth(mentor_token))
+    profile = client.get("/api/me", headers=auth(mentor_token)).json()["profile"]
+    assert (profile["pendingCount"], profile["matched"]) == (0, True)
+    assert app_module.repair_mentor_counters(db) == 0
+
+
+def test_mentor_list_availability_order(client, make_mentor, make_mentee, make_request):
+    matched, matched_token = make_mentor(name="matched")
+    busy, _ = make_mentor(name="busy")
+    free, _ = make_mentor(name="free")
+    (m1, t1), (m2, t2), (m3, t3) = make_mentee(), make_mentee(), make_mentee()
+    accepted = make_request(m1, t1, matched)
+    client.put(f"/api/match-requests/{accepted['id']}/accept", headers=auth(matched_token))
+    make_request(m2, t2, busy)
+    make_request(m3, t3, busy)
+    r = client.get("/api/mentors", headers=auth(t1), params={"order_by": "availability"})
+    # 매칭 안 된 멘토 중 대기 요청이 적은 순, 매칭된 멘토는 마지막
+    assert [(m["profile"]["name"], m["profile"]["pendingCount"], m["profile"]["matched"]) for m in r.json()] == [
+        ("free", 0, False), ("busy", 2, False), ("matched", 0, True),
+    ]
+
+
+def test_match_request_changes_feed(client, make_mentor, make_mentee, make_request):
+    mentor, mentor_token = make_mentor()
+    mentee1, token1 = make_mentee()
+    mentee2, token2 = make_mentee()
+    req1 = make_request(mentee1, token1, mentor)
+    req2 = make_request(mentee2, token2, mentor)
+    feed = client.get("/api/match-requests/changes", headers=auth(mentor_token)).json()
+    assert [c["id"] for c in feed["changes"]] == [req1["id"], req2["id"]]
+    client.put(f"/api/match-requests/{req1['id']}/accept", headers=auth(mentor_token))
+    delta = client.get("/api/match-requests/changes", headers=auth(mentor_token), params={"since": feed["cursor"]}).json()
+    assert {c["id"]: c["status"] for c in delta["changes"]} == {req1["id"]: "accepted", req2["id"]: "rejected"}
+    # 멘티는 자기 요청의 변경분만 받음
+    mine = client.get("/api/match-requests/changes", headers=auth(token2)).json()
+    assert {c["id"] for c in mine["changes"]} == {req2["id"]}
+
+
+def test_archive_terminal_requests(client, db, make_mentor, make_mentee, make_request):
+    mentor, mentor_token = make_mentor()
+    mentee, token = make_mentee()
+    req = make_request(mentee, token, mentor)
+    client.put(f"/api/match-requests/{req['id']}/reject", headers=auth(mentor_token))
+    db.query(app_module.MatchRequest).update({app_module.MatchRequest.closed_at: datetime.utcnow() - timedelta(days=365)})
+    db.commit()
+    assert app_module.archive_match_requests() == 1
+    assert client.get("/api/match-requests/outgoing", headers=auth(token)).json() == []
+    archived = client.get("/api/match-requests/outgoing", headers=auth(token), params={"include": "archived"}).json()
+    assert [r["status"] for r in archived] == ["rejected"]
+
+
+def test_expire_stale_pending_requests(client, db, make_mentor, make_mentee, make_request):
+    mentor, mentor_token = make_mentor()
+    (m1, t1), (m2, t2) = make_mentee(), make_mentee()
+    stale = make_request(m1, t1, mentor)
+    fresh = make_request(m2, t2, mentor)
+    old = datetime.utcnow() - timedelta(days=app_module.PENDING_REQUEST_TTL_DAYS + 1)
+    db.query(app_module.MatchRequest).filter(app_module.MatchRequest.id == stale["id"]).update(
+        {app_module.MatchRequest.created_at: old}
+    )
+    db.commit()
+    assert app_module.expire_pending_requests() == 1
+    incoming = {r["id"]: r["status"] for r in client.get("/api/match-requests/incoming", headers=auth(mentor_token)).json()}
+    assert incoming == {stale["id"]: "expired", fresh["id"]: "pending"}
+    assert client.get("/api/me", headers=auth(mentor_token)).json()["profile"]["pendingCount"] == 1
+    # 생성 시각 범위 필터
+    cutoff = (old + timedelta(days=1)).isoformat()
+    recent = client.get("/api/match-requests/incoming", headers=auth(mentor_token), params={"since": cutoff}).json()
+    assert [r["id"] for r in recent] == [fresh["id"]]
+    older = client.get("/api/match-requests/incoming", headers=auth(mentor_token), params={"before": cutoff}).json()
+    assert [r["id"] for r in older] == [stale["id"]]
+    # offset이 있는 시각은 UTC로 변환해 비교 (KST 클라이언트)
+    kst = timezone(timedelta(hours=9))
+    an_hour_ago = (datetime.now(timezone.utc) - timedelta(hours=1)).astimezone(kst).isoformat()
+    recent = client.get("/api/match-requests/incoming", headers=auth(mentor_token), params={"since": an_hour_ago}).json()
+    assert [r["id"] for r in recent] == [fresh["id"]]
+
 
-def test_match_request(mentee_token, mentor_id, mentee_id):
-    headers = {"Authorization": f"Bearer {mentee_token}"}
-    r = requests.post(f"{API}/match-requests", json={
-        "mentorId": mentor_id,
-        "menteeId": mentee_id,
-        "message": "멘토링 요청합니다!"
-    }, headers=headers)
-    assert r.status_code in (200, 400)
-
-def test_incoming_outgoing(mentor_token, mentee_token):
-    # 멘토: 들어온 요청
-    r = requests.get(f"{API}/match-requests/incoming", headers={"Authorization": f"Bearer {mentor_token}"})
+def test_expiry_skips_requests_changed_concurrently(client, db, db_sessionmaker, make_mentor, make_mentee, make_request):
+    mentor, mentor_token = make_mentor()
+    mentee, token = make_mentee()
+    req = make_request(mentee, token, mentor)
+    old = datetime.utcnow() - timedelta(days=app_module.PENDING_REQUEST_TTL_DAYS + 1)
+    db.query(app_module.MatchRequest).update({app_module.MatchRequest.created_at: old})
+    db.commit()
+    # 만료 배치가 pending 행을 읽은 직후 멘티가 요청을 취소
+    batch_db = db_sessionmaker()
+    cancelled = []
+
+    def cancel_after_load(state):
+        if state.is_select and not cancelled:
+            result = state.invoke_statement().freeze()
+            cancelled.append(client.delete(f"/api/match-requests/{req['id']}", headers=auth(token)))
+            return result()
+
+    event.listen(batch_db, "do_orm_execute", cancel_after_load)
+    try:
+        app_module.expire_pending_requests_batch(batch_db, datetime.utcnow())
+    finally:
+        batch_db.close()
+    assert cancelled[0].status_code == 200
+    incoming = client.get("/api/match-requests/incoming", headers=auth(mentor_token)).json()
+    assert [r["status"] for r in incoming] == ["cancelled"]
+    assert client.get("/api/me", headers=auth(mentor_token)).json()["profile"]["pendingCount"] == 0
+
+
+# --- 내보내기 ---
+def test_export_requires_admin(client, make_mentee, monkeypatch):
+    admin, admin_token = make_mentee(email="admin@test.com")
+    _, token = make_mentee()
+    monkeypatch.setattr(app_module, "ADMIN_EMAILS", {"admin@test.com"})
+    assert client.get("/api/export/users", headers=auth(token)).status_code == 403
+    r = client.get("/api/export/users", headers=auth(admin_token), params={"format": "csv"})
+    assert r.status_code == 200
+    lines = r.text.strip().splitlines()
+    assert lines[0].startswith("id,email")
+    assert len(lines) == 3
+
+
+def test_export_match_requests_in_chunks(client, db, make_mentor, make_mentee, make_request, monkeypatch):
+    admin, admin_token = make_mentee(email="admin@test.com")
+    monkeypatch.setattr(app_module, "ADMIN_EMAILS", {"admin@test.com"})
+    monkeypatch.setattr(app_module, "EXPORT_CHUNK_SIZE", 2)
+    mentor, _ = make_mentor()
+    reqs = [make_request(m, t, mentor) for m, t in (make_mentee() for _ in range(5))]
+    old = datetime.utcnow() - timedelta(days=3)
+    db.query(app_module.MatchRequest).filter(app_module.MatchRequest.id <= reqs[1]["id"]).update(
+        {app_module.MatchRequest.created_at: old}
+    )
+    db.commit()
+    r = client.get("/api/export/match-requests", headers=auth(admin_token), params={"include": "archived"})
+    assert [json.loads(line)["id"] for line in r.text.splitlines()] == [req["id"] for req in reqs]
+    r = client.get("/api/export/match-requests", headers=auth(admin_token), params={"since": reqs[2]["id"]})
+    assert [json.loads(line)["id"] for line in r.text.splitlines()] == [reqs[3]["id"], reqs[4]["id"]]
+    since = (datetime.utcnow() - timedelta(days=1)).isoformat()
+    r = client.get("/api/export/match-requests", headers=auth(admin_token), params={"since": since, "format": "csv"})
+    lines = r.text.strip().splitlines()
+    assert lines[0].startswith("id,") and [int(line.split(",")[0]) for line in lines[1:]] == [req["id"] for req in reqs[2:]]
+
+
+# --- 스킬 자동완성 ---
+def test_skill_suggest(client, make_mentor, make_mentee):
+    # 인덱스는 앱 기동 시 만들어지므로 이후 직접 추가한 멘토를 반영하려면 재구성
+    make_mentor(skills="Python,FastAPI")
+    make_mentor(skills="python,pandas")
+    mentor, mentor_token = make_mentor(skills="go")
+    _, token = make_mentee()
+    app_module.rebuild_skill_index()
+    r = client.get("/api/skills/suggest", headers=auth(token), params={"prefix": "P"})
+    assert r.json() == [{"skill": "python", "count": 2}, {"skill": "pandas", "count": 1}]
+    client.put("/api/profile", headers=auth(mentor_token), json={
+        "id": mentor.id, "name": mentor.name, "role": "mentor", "bio": "", "skills": ["pandas", "pytorch"],
+    })
+    r = client.get("/api/skills/suggest", headers=auth(token), params={"prefix": "p"})
+    assert [s["skill"] for s in r.json()] == ["pandas", "python", "pytorch"]
+    assert client.get("/api/skills/suggest", headers=auth(token), params={"prefix": "go"}).json() == []
+
+
+def test_skill_index_update_for_mentor_created_after_startup(client, make_mentor, make_mentee):
+    # 인덱스 재구성 없이 (다른 워커가 만든 멘토처럼) 인덱스에 없는 스킬을 가진 멘토가 프로필 수정
+    mentor, mentor_token = make_mentor(skills="go")
+    _, token = make_mentee()
+    r = client.put("/api/profile", headers=auth(mentor_token), json={
+        "id": mentor.id, "name": mentor.name, "role": "mentor", "bio": "", "skills": ["rust"],
+    })
     assert r.status_code == 200
-    # 멘티: 보낸 요청
-    r = requests.get(f"{API}/match-requests/outgoing", headers={"Authorization": f"Bearer {mentee_token}"})
+    r = client.patch("/api/profile", headers=auth(mentor_token), json={"skills": ["zig"]})
+    assert r.status_code == 200
+    assert client.get("/api/skills/suggest", headers=auth(token), params={"prefix": "zi"}).json() == [{"skill": "zig", "count": 1}]
+
+
+# --- 요청 프로파일링 ---
+def test_request_profiling_opt_in(client, make_mentor, make_mentee, monkeypatch):
+    make_mentor(skills="python")
+    admin, admin_token = make_mentee(email="admin@test.com")
+    _, token = make_mentee()
+    monkeypatch.setattr(app_module, "ADMIN_EMAILS", {"admin@test.com"})
+    # 관리자가 아니면 헤더를 보내도 프로파일링하지 않음
+    r = client.get("/api/mentors", headers={**auth(token), "X-Profile": "1"})
+    assert r.status_code == 200 and "X-Profile-Id" not in r.headers
+    r = client.get("/api/mentors", headers={**auth(admin_token), "X-Profile": "1"})
+    assert r.status_code == 200 and len(r.json()) == 1
+    assert "orm" in r.headers["Server-Timing"] and "serialize" in r.headers["Server-Timing"]
+    profile_id = r.headers["X-Profile-Id"]
+    summary = client.get(f"/api/admin/profiles/{profile_id}", headers=auth(admin_token)).json()
+    assert summary["path"] == "/api/mentors"
+    assert set(summary["sectionsMs"]) >= {"orm", "serialize"}
+    r = client.get(f"/api/admin/profiles/{profile_id}", headers=auth(admin_token), params={"format": "collapsed"})
     assert r.status_code == 200
+    assert client.get("/api/admin/profiles", headers=auth(token)).status_code == 403
+
+
+def test_profile_samples_only_threads_running_the_request():
+    # 같은 endpoint를 동시에 처리하는 다른 요청의 스레드는 프로파일에 섞이지 않음
+    prof = app_module.RequestProfile("GET", "/api/mentors")
+    stop = threading.Event()
+
+    def profiled_request_work():
+        with prof.running():
+            time.sleep(0.2)
+
+    def other_request_work():
+        time.sleep(0.2)
 
-def test_profile_image(token, role, user_id):
-    headers = {"Authorization": f"Bearer {token}"}
-    r = requests.get(f"{API}/images/{role}/{user_id}", headers=headers, allow_redirects=False)
-    assert r.status_code in (200, 307, 302)
-
-def run_all():
-    test_signup()
-    mentor_token, mentee_token = test_login()
-    mentor_id = get_user_id(mentor_token)
-    mentee_id = get_user_id(mentee_token)
-    # 멘토/멘티 프로필 수정
-    test_profile_update(mentor_token, "mentor", mentor_id)
-    test_profile_update(mentee_token, "mentee", mentee_id)
-    # 멘토 리스트
-    mentors = test_mentor_list(mentee_token)
-    assert len(mentors) > 0
-    # 매칭 요청
-    test_match_request(mentee_token, mentor_id, mentee_id)
-    # 매칭 요청 목록
-    test_incoming_outgoing(mentor_token, mentee_token)
-    # 프로필 이미지(멘토/멘티)
-    test_profile_image(mentor_token, "mentor", mentor_id)
-    test_profile_image(mentee_token, "mentee", mentee_id)
-    print("✅ 모든 주요 API 테스트 통과!")
-
-if __name__ == "__main__":
-    run_all()
+    sampler = threading.Thread(target=app_module._sample_stacks, args=(prof, stop))
+    workers = [threading.Thread(target=f) for f in (profiled_request_work, other_request_work)]
+    sampler.start()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    stop.set()
+    sampler.join()
+    assert "profiled_request_work" in prof.collapsed()
+    assert "other_request_work" not in prof.collapsed()
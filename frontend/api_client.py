@@ -0,0 +1,174 @@
+"""
+멘토-멘티 Streamlit 앱용 API 클라이언트
+- requests.Session 하나로 커넥션 풀/keep-alive 재사용
+- 읽기 API는 (토큰, 경로, 파라미터) 기준 TTL 캐시, 변경 API 호출 후 캐시 무효화
+- Lottie 애니메이션 JSON은 로컬 디스크에 캐시
+- 서로 독립적인 GET 요청과 아직 받지 않은 Lottie 파일은 공용 스레드 풀로 동시에 조회
+- 목록 API는 msgpack(설치된 경우)으로 받고, gzip/br 압축 해제는 requests/urllib3가 처리
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import msgpack
+except ImportError:  # msgpack 미설치 시 JSON으로만 요청
+    msgpack = None
+
+API_URL = os.getenv("API_URL", "http://localhost:8080/api")
+CACHE_TTL = float(os.getenv("API_CACHE_TTL", "30"))
+LOTTIE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".lottie_cache")
+REQUEST_TIMEOUT = 10
+CACHE_MAX_ENTRIES = 512
+LOTTIE_RETRY_AFTER = 60
+
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+if msgpack is not None:
+    _session.headers["Accept"] = "application/msgpack, application/json;q=0.9"
+
+# 독립적인 요청을 동시에 보내기 위한 공용 스레드 풀 (Streamlit rerun 간 재사용)
+_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="api-client")
+
+_cache = OrderedDict()  # key → (만료 시각, 응답), 최근 사용 순
+_cache_lock = threading.Lock()
+_lottie_memo = {}
+_lottie_failed = {}
+
+
+class ApiResponse:
+    """캐시 가능한 응답 (requests.Response와 같은 방식으로 사용)"""
+
+    def __init__(self, status_code, data, text="", headers=None):
+        self.status_code = status_code
+        self.data = data
+        self.text = text
+        self.headers = headers or {}
+
+    def json(self):
+        return self.data
+
+
+def _headers(token):
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+def _wrap(r):
+    try:
+        if msgpack is not None and r.headers.get("content-type", "").startswith("application/msgpack"):
+            data = msgpack.unpackb(r.content)
+        else:
+            data = r.json()
+    except ValueError:
+        data = {}
+    return ApiResponse(r.status_code, data, r.text, CaseInsensitiveDict(r.headers))
+
+
+def _cache_key(token, path, params):
+    return (token, path, tuple(sorted((params or {}).items())))
+
+
+def get(path, token=None, params=None, cache=True):
+    """GET 요청. 200 응답만 TTL 동안 캐시한다."""
+    key = _cache_key(token, path, params)
+    now = time.monotonic()
+    if cache:
+        with _cache_lock:
+            hit = _cache.get(key)
+            if hit:
+                _cache.move_to_end(key)
+        if hit and hit[0] > now:
+            return hit[1]
+    resp = _wrap(_session.get(f"{API_URL}{path}", headers=_headers(token), params=params, timeout=REQUEST_TIMEOUT))
+    if cache and resp.status_code == 200:
+        with _cache_lock:
+            _cache[key] = (now + CACHE_TTL, resp)
+            _cache.move_to_end(key)
+            if len(_cache) > CACHE_MAX_ENTRIES:
+                # 만료된 항목(갱신 전 토큰 등)을 먼저 정리하고, 그래도 많으면 오래 안 쓴 항목부터 제거
+                for k in [k for k, v in _cache.items() if v[0] <= now]:
+                    del _cache[k]
+                while len(_cache) > CACHE_MAX_ENTRIES:
+                    _cache.popitem(last=False)
+    return resp
+
+
+def get_many(calls, token=None):
+    """[(path, params), ...] GET 요청을 동시에 보내고 같은 순서로 응답을 반환"""
+    return list(_pool.map(lambda call: get(call[0], token, call[1]), calls))
+
+
+def invalidate():
+    # 다른 사용자의 목록(예: 멘토의 incoming)도 바뀌므로 전체 캐시를 비운다
+    with _cache_lock:
+        _cache.clear()
+
+
+def _mutate(method, path, token=None, **kwargs):
+    r = _session.request(method, f"{API_URL}{path}", headers=_headers(token), timeout=REQUEST_TIMEOUT, **kwargs)
+    if r.status_code < 400:
+        invalidate()
+    return _wrap(r)
+
+
+def post(path, token=None, **kwargs):
+    return _mutate("POST", path, token, **kwargs)
+
+
+def put(path, token=None, **kwargs):
+    return _mutate("PUT", path, token, **kwargs)
+
+
+def patch(path, token=None, **kwargs):
+    return _mutate("PATCH", path, token, **kwargs)
+
+
+def delete(path, token=None, **kwargs):
+    return _mutate("DELETE", path, token, **kwargs)
+
+
+def load_lottie(url):
+    """Lottie JSON을 메모리 → 디스크 → 네트워크 순으로 조회"""
+    if url in _lottie_memo:
+        return _lottie_memo[url]
+    if time.monotonic() < _lottie_failed.get(url, 0):
+        return None
+    path = os.path.join(LOTTIE_CACHE_DIR, hashlib.sha1(url.encode()).hexdigest() + ".json")
+    anim = None
+    try:
+        with open(path, encoding="utf-8") as f:
+            anim = json.load(f)
+    except (OSError, ValueError):
+        try:
+            r = _session.get(url, timeout=REQUEST_TIMEOUT)
+            if r.status_code == 200:
+                anim = r.json()
+                os.makedirs(LOTTIE_CACHE_DIR, exist_ok=True)
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(anim, f)
+        except Exception:
+            anim = None
+    if anim is not None:
+        _lottie_memo[url] = anim
+    else:
+        # 네트워크 실패 시 매 rerun마다 타임아웃을 기다리지 않도록 잠시 재시도 보류
+        _lottie_failed[url] = time.monotonic() + LOTTIE_RETRY_AFTER
+    return anim
+
+
+def prefetch_lotties(urls):
+    """아직 캐시되지 않은 Lottie 파일을 동시에 내려받아 둔다"""
+    now = time.monotonic()
+    missing = [u for u in urls if u not in _lottie_memo and now >= _lottie_failed.get(u, 0)]
+    if missing:
+        list(_pool.map(load_lottie, missing))
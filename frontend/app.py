@@ -5,12 +5,19 @@
 - 와우포인트: 컬러풀한 카드, 실시간 상태, 이미지 업로드, 토스트, 다크모드 등
 """
 import streamlit as st
-import requests
 import base64
+import hashlib
 from streamlit_lottie import st_lottie
-import json
+import api_client as api
 
-API_URL = "http://localhost:8080/api"
+API_URL = api.API_URL
+MENTOR_PAGE_SIZE = 20
+LOTTIE_URLS = [
+    "https://assets2.lottiefiles.com/packages/lf20_0yfsb3a1.json",
+    "https://assets2.lottiefiles.com/packages/lf20_4kx2q32n.json",
+    "https://assets2.lottiefiles.com/packages/lf20_2ks3pjua.json",
+    "https://assets2.lottiefiles.com/packages/lf20_3rwasyjy.json",
+]
 
 st.set_page_config(page_title="멘토-멘티 매칭", page_icon="🤝", layout="wide", initial_sidebar_state="expanded")
 
@@ -19,40 +26,53 @@ if "token" not in st.session_state:
     st.session_state.token = None
 if "user" not in st.session_state:
     st.session_state.user = None
+if "refresh_token" not in st.session_state:
+    st.session_state.refresh_token = None
 
-def api_headers():
-    return {"Authorization": f"Bearer {st.session_state.token}"} if st.session_state.token else {}
+def api_token():
+    return st.session_state.token
+
+def refresh_access_token():
+    # 만료된 access token을 refresh token으로 갱신 (재로그인/bcrypt 검증 없이)
+    if not st.session_state.refresh_token:
+        return False
+    try:
+        r = api.post("/token/refresh", json={"refreshToken": st.session_state.refresh_token})
+    except Exception:
+        return False
+    if r.status_code != 200:
+        return False
+    st.session_state.token = r.json()["token"]
+    st.session_state.refresh_token = r.json().get("refreshToken")
+    return True
 
 def toast(msg, icon="✅"):
     st.toast(msg, icon=icon)
 
 def load_lottie_url(url):
-    try:
-        r = requests.get(url)
-        if r.status_code == 200:
-            return r.json()
-    except Exception:
-        return None
-    return None
+    return api.load_lottie(url)
 
 def status_badge(status):
     color = {
         "pending": "#FFD600",
         "accepted": "#00C853",
         "rejected": "#D50000",
-        "cancelled": "#757575"
+        "cancelled": "#757575",
+        "expired": "#B0BEC5"
     }.get(status, "#90A4AE")
     emoji = {
         "pending": "⏳",
         "accepted": "✅",
         "rejected": "❌",
-        "cancelled": "🗑️"
+        "cancelled": "🗑️",
+        "expired": "⌛"
     }.get(status, "🔖")
     label = {
         "pending": "대기중",
         "accepted": "수락됨",
         "rejected": "거절됨",
-        "cancelled": "취소됨"
+        "cancelled": "취소됨",
+        "expired": "만료됨"
     }.get(status, status)
     return f"<span style='background:{color};color:#222;padding:2px 10px;border-radius:12px;font-size:13px;font-weight:600;display:inline-block;margin-left:8px;'>{emoji} {label}</span>"
 
@@ -75,9 +95,10 @@ def login_signup_ui():
             submitted = st.form_submit_button("로그인")
             if submitted:
                 data = {"username": email, "password": pw}
-                r = requests.post(f"{API_URL}/login", data=data)
+                r = api.post("/login", data=data)
                 if r.status_code == 200:
                     st.session_state.token = r.json()["token"]
+                    st.session_state.refresh_token = r.json().get("refreshToken")
                     lottie_anim("https://assets2.lottiefiles.com/packages/lf20_4kx2q32n.json", height=90, key="login_success")
                     toast("로그인 성공!", "🎉")
                     st.rerun()
@@ -93,7 +114,7 @@ def login_signup_ui():
             submitted = st.form_submit_button("회원가입")
             if submitted:
                 data = {"email": email, "password": pw, "name": name, "role": role}
-                r = requests.post(f"{API_URL}/signup", json=data)
+                r = api.post("/signup", json=data)
                 if r.status_code == 201:
                     lottie_anim("https://assets2.lottiefiles.com/packages/lf20_4kx2q32n.json", height=90, key="signup_success")
                     toast("회원가입 성공! 로그인 해주세요.", "🎉")
@@ -103,11 +124,14 @@ def login_signup_ui():
 
 # --- 내 정보/프로필 ---
 def profile_ui():
-    r = requests.get(f"{API_URL}/me", headers=api_headers())
+    r = api.get("/me", api_token())
+    if r.status_code == 401 and refresh_access_token():
+        r = api.get("/me", api_token())
     if r.status_code != 200:
         lottie_anim("https://assets2.lottiefiles.com/packages/lf20_2ks3pjua.json", height=90, key="auth_fail")
         st.error("인증 오류. 다시 로그인 해주세요.")
         st.session_state.token = None
+        st.session_state.refresh_token = None
         st.session_state.user = None
         st.rerun()
     user = r.json()
@@ -116,7 +140,14 @@ def profile_ui():
     st.sidebar.image(f"{API_URL}/images/{user['role']}/{user['id']}", width=100)
     st.sidebar.write(user['email'])
     if st.sidebar.button("로그아웃", use_container_width=True):
+        # 서버에서도 refresh token을 폐기해야 로그아웃 후 재사용할 수 없음
+        if st.session_state.refresh_token:
+            try:
+                api.post("/token/revoke", json={"refreshToken": st.session_state.refresh_token})
+            except Exception:
+                pass
         st.session_state.token = None
+        st.session_state.refresh_token = None
         st.session_state.user = None
         lottie_anim("https://assets2.lottiefiles.com/packages/lf20_2ks3pjua.json", height=80, key="logout_anim")
         st.rerun()
@@ -140,17 +171,24 @@ def profile_ui():
             skills = st.text_input("기술 스택 (쉼표로 구분)", value=", ".join(user['profile'].get('skills', [])))
         submitted = st.form_submit_button("프로필 저장")
         if submitted:
-            payload = {
-                "id": user["id"],
-                "name": name,
-                "role": user["role"],
-                "bio": bio,
-                "image": img_b64 if img_file else None,
-            }
+            # 바뀐 필드만 PATCH로 전송 (이미 올린 이미지는 다시 보내지 않음)
+            payload = {}
+            if name != user['profile']['name']:
+                payload["name"] = name
+            if bio != user['profile']['bio']:
+                payload["bio"] = bio
+            if img_file:
+                img_hash = hashlib.sha256(img_bytes).hexdigest()
+                if img_hash != st.session_state.get("uploaded_image_hash"):
+                    payload["image"] = img_b64
             if user['role'] == "mentor":
-                payload["skills"] = [s.strip() for s in skills.split(",") if s.strip()]
-            r2 = requests.put(f"{API_URL}/profile", json=payload, headers=api_headers())
-            if r2.status_code == 200:
+                new_skills = [s.strip() for s in skills.split(",") if s.strip()]
+                if new_skills != user['profile'].get('skills', []):
+                    payload["skills"] = new_skills
+            r2 = api.patch("/profile", api_token(), json=payload) if payload else None
+            if r2 is None or r2.status_code == 200:
+                if "image" in payload:
+                    st.session_state.uploaded_image_hash = img_hash
                 lottie_anim("https://assets2.lottiefiles.com/packages/lf20_4kx2q32n.json", height=80, key="profile_save")
                 toast("프로필이 저장되었습니다!", "🎨")
                 st.rerun()
@@ -161,18 +199,38 @@ def profile_ui():
 # --- 멘토 리스트/매칭 ---
 def mentor_list_ui():
     st.markdown('<div class="section-title">멘토 리스트 👩‍💻👨‍💻</div>', unsafe_allow_html=True)
-    skill = st.text_input("기술 스택으로 검색", key="search_skill")
-    order = st.radio("정렬 기준", ["id", "name", "skill"], horizontal=True)
-    params = {}
-    if skill:
-        params["skill"] = skill
+    # 입력할 때마다 조회하지 않도록 검색 조건은 폼 제출 시에만 반영
+    with st.form("mentor_search_form"):
+        skill = st.text_input("기술 스택으로 검색", key="search_skill")
+        order = st.radio("정렬 기준", ["id", "name", "skill", "availability"], horizontal=True)
+        st.form_submit_button("검색")
+    params = {"page_size": MENTOR_PAGE_SIZE}
+    if skill.strip():
+        params["skill"] = skill.strip()
     if order:
         params["order_by"] = order
-    r = requests.get(f"{API_URL}/mentors", headers=api_headers(), params=params)
-    if r.status_code != 200:
-        st.error("멘토 리스트를 불러올 수 없습니다.")
-        return
-    mentors = r.json()
+    # 검색 조건이 바뀌면 첫 페이지부터 다시 로드
+    query = (params.get("skill"), order)
+    if st.session_state.get("mentor_query") != query:
+        st.session_state.mentor_query = query
+        st.session_state.mentor_pages = 1
+    # 추천 스킬과 멘토 페이지들은 서로 독립적이므로 한 번에 동시 요청
+    calls = [("/mentors", {**params, "page": page}) for page in range(1, st.session_state.mentor_pages + 1)]
+    if skill.strip():
+        calls.append(("/skills/suggest", {"prefix": skill.strip(), "limit": 5}))
+    responses = api.get_many(calls, api_token())
+    if skill.strip():
+        r = responses.pop()
+        if r.status_code == 200 and r.json():
+            st.caption("추천 스킬: " + ", ".join(f"{s['skill']} ({s['count']})" for s in r.json()))
+    mentors = []
+    total = 0
+    for r in responses:
+        if r.status_code != 200:
+            st.error("멘토 리스트를 불러올 수 없습니다.")
+            return
+        mentors.extend(r.json())
+        total = int(r.headers.get("X-Total-Count", len(mentors)))
     st.markdown('<hr class="divider">', unsafe_allow_html=True)
     cols = st.columns(2)
     # --- 멘토링 요청 폼 상태 관리 ---
@@ -184,8 +242,9 @@ def mentor_list_ui():
                 <div class="mentor-card" style="background: linear-gradient(90deg,#6C63FF,#48C6EF); padding:18px 16px 12px 16px; border-radius:18px; box-shadow:0 4px 16px #0002; margin-bottom:18px; color:white; position:relative;">
                     <h4 style="margin-bottom:4px;">✨ {m['profile']['name']}</h4>
                     <span style="font-size:13px; opacity:0.8;">{', '.join(m['profile']['skills'])}</span>
+                    <div style="font-size:12px; opacity:0.8;">{'🔒 매칭 완료' if m['profile'].get('matched') else '🟢 매칭 가능'} · 대기 요청 {m['profile'].get('pendingCount', 0)}건</div>
                     <div style="margin:8px 0;">
-                        <img src='{API_URL}/images/mentor/{m['id']}' width='90' class='img-preview'>
+                        <img src='{API_URL}/images/mentor/{m['id']}?size=thumb' width='90' loading='lazy' class='img-preview'>
                     </div>
                     <div style="font-size:14px;">{m['profile']['bio']}</div>
                 </div>
@@ -203,7 +262,7 @@ def mentor_list_ui():
                                 "message": msg,
                             }
                             st.write(f"멘토ID: {m['id']}, 멘티ID: {st.session_state.user['id']}")  # 로그창에 출력
-                            r2 = requests.post(f"{API_URL}/match-requests", json=payload, headers=api_headers())
+                            r2 = api.post("/match-requests", api_token(), json=payload)
                             if r2.status_code == 200:
                                 # 화려한 안내: Lottie + Balloon + 컬러 메시지
                                 lottie_anim("https://assets2.lottiefiles.com/packages/lf20_4kx2q32n.json", height=120, key=f"req_success_{m['id']}")
@@ -218,13 +277,17 @@ def mentor_list_ui():
                     if st.button(f"멘토링 요청하기 ({m['id']})", key=f"req_{m['id']}", help="멘토에게 매칭 요청을 보냅니다."):
                         st.session_state.requesting_mentor_id = m['id']
                         st.rerun()
+    if len(mentors) < total:
+        if st.button(f"더 보기 ({len(mentors)}/{total})", key="mentor_more", use_container_width=True):
+            st.session_state.mentor_pages += 1
+            st.rerun()
 
 # --- 매칭 요청 목록 ---
 def match_requests_ui():
     st.header("매칭 요청 현황 📨")
     user = st.session_state.user
     if user['role'] == "mentor":
-        r = requests.get(f"{API_URL}/match-requests/incoming", headers=api_headers())
+        r = api.get("/match-requests/incoming", api_token())
         st.subheader("들어온 요청")
         if r.status_code != 200:
             st.error("매칭 요청을 불러오지 못했습니다.")
@@ -239,21 +302,21 @@ def match_requests_ui():
             if req['status'] == "pending":
                 c1, c2 = st.columns(2)
                 if c1.button("수락", key=f"accept_{req['id']}"):
-                    r2 = requests.put(f"{API_URL}/match-requests/{req['id']}/accept", headers=api_headers())
+                    r2 = api.put(f"/match-requests/{req['id']}/accept", api_token())
                     if r2.status_code == 200:
                         lottie_anim("https://assets2.lottiefiles.com/packages/lf20_4kx2q32n.json", height=70, key=f"accept_anim_{req['id']}")
                         toast("요청을 수락했습니다!", "👍")
                         st.balloons()
                         st.rerun()
                 if c2.button("거절", key=f"reject_{req['id']}"):
-                    r2 = requests.put(f"{API_URL}/match-requests/{req['id']}/reject", headers=api_headers())
+                    r2 = api.put(f"/match-requests/{req['id']}/reject", api_token())
                     if r2.status_code == 200:
                         lottie_anim("https://assets2.lottiefiles.com/packages/lf20_2ks3pjua.json", height=70, key=f"reject_anim_{req['id']}")
                         toast("요청을 거절했습니다!", "❌")
                         st.snow()
                         st.rerun()
     else:
-        r = requests.get(f"{API_URL}/match-requests/outgoing", headers=api_headers())
+        r = api.get("/match-requests/outgoing", api_token())
         st.subheader("보낸 요청")
         if r.status_code != 200:
             st.error("매칭 요청을 불러오지 못했습니다.")
@@ -279,7 +342,7 @@ def match_requests_ui():
                 st.markdown('<div style="background:linear-gradient(90deg,#757575,#90A4AE);color:#fff;padding:12px 16px 10px 16px;border-radius:14px;font-size:1.02rem;font-weight:500;box-shadow:0 1px 4px #0001;margin-bottom:8px;display:flex;align-items:center;gap:8px;">🗑️ <span>매칭 요청이 취소되었습니다.</span></div>', unsafe_allow_html=True)
             if req['status'] == "pending":
                 if st.button("요청 취소", key=f"cancel_{req['id']}"):
-                    r2 = requests.delete(f"{API_URL}/match-requests/{req['id']}", headers=api_headers())
+                    r2 = api.delete(f"/match-requests/{req['id']}", api_token())
                     if r2.status_code == 200:
                         lottie_anim("https://assets2.lottiefiles.com/packages/lf20_3rwasyjy.json", height=80, key=f"cancel_anim_{req['id']}")
                         toast("요청을 취소했습니다!", "🗑️")
@@ -287,6 +350,8 @@ def match_requests_ui():
 
 # --- 메인 라우팅 ---
 def main():
+    # Lottie 에셋은 최초 1회만 동시에 내려받아 디스크에 캐시
+    api.prefetch_lotties(LOTTIE_URLS)
     if not st.session_state.token:
         login_signup_ui()
         return